@@ -1,10 +1,11 @@
 try:
-    from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+    from flask import Flask, Response, render_template, request, redirect, url_for, flash, jsonify
     import logging
     import sys
     import os
     import traceback
     import datetime
+    import threading
     from dotenv import load_dotenv
     
     # Load environment variables from .env file
@@ -16,10 +17,16 @@ try:
     sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
     
     # Import from the analysis directory directly
-    from app.analysis import data_fetch, sentiment, llm
+    # (heavy dependencies inside are loaded lazily; see app/analysis/lazy.py)
+    import time
+    _import_started = time.perf_counter()
+    from app.analysis import data_fetch, sentiment, llm, warm_up
+    from app.analysis.pipeline import AnalysisPipeline
+    from app.analysis.lazy import load_timings
+    from app import events, jobs, shared_state
+    IMPORT_SECONDS = round(time.perf_counter() - _import_started, 4)
     from apscheduler.schedulers.background import BackgroundScheduler
     import atexit
-    import time
     
     # Check if all required modules are available
     MODULES_AVAILABLE = True
@@ -56,19 +63,85 @@ logging.basicConfig(
     filename='app.log',
     format='%(asctime)s %(levelname)s: %(message)s'
 )
+logging.info(f"Analysis modules imported in {IMPORT_SECONDS}s")
 
 # Global cache for default stocks
 cached_results = {}
 last_refresh_time = None
 
+# fetch -> score -> aggregate -> risk, shared by the scheduler and the form
+pipeline = AnalysisPipeline()
+
+# Live updates: every refresh pushes per-symbol changes to connected dashboards
+broker = events.EventBroker(max_subscribers=config.STREAM_MAX_SUBSCRIBERS)
+
 # 1) SCHEDULER to refresh data every 30 minutes (or so).
 scheduler = BackgroundScheduler()
 
+# Under gunicorn (config.SHARED_STATE_ENABLED) one worker holds the leader lock:
+# only the leader runs the scheduler and refreshes, and publishes each result as
+# a versioned snapshot that every worker serves. Without it, each process is
+# its own leader.
+shared_store = shared_state.SnapshotStore(config.SHARED_STATE_PATH) if config.SHARED_STATE_ENABLED else None
+leader_lock = shared_state.LeaderLock(config.LEADER_LOCK_PATH) if config.SHARED_STATE_ENABLED else None
+snapshot_version = 0
+# Serializes swapping in results (request threads, the refresh job and the
+# shared-state loop all do it), so each snapshot is applied once and in order
+results_lock = threading.Lock()
+
+def is_leader():
+    return leader_lock is None or leader_lock.held
+
+def apply_results(data, refreshed_at, version=None):
+    """
+    Make `data` the served default-stock results and push what changed to
+    this worker's open dashboards. With a snapshot `version`, results that
+    are not newer than the served snapshot are skipped. Returns whether
+    `data` was applied.
+    """
+    global cached_results, last_refresh_time, snapshot_version
+    with results_lock:
+        if version is not None:
+            if version <= snapshot_version:
+                return False
+            snapshot_version = version
+        previous = cached_results
+        cached_results = data
+        last_refresh_time = refreshed_at
+
+        # Push what changed to open dashboards (one fan-out per symbol update)
+        for sym, info in data.items():
+            delta = events.symbol_delta(sym, previous.get(sym), info)
+            if delta:
+                broker.publish("symbol", delta)
+        # Pages that were waiting for the first data reload on this
+        broker.publish("refreshed", {"last_refresh_time": last_refresh_time})
+    return True
+
+def sync_snapshot():
+    """
+    Load the leader's latest snapshot if it is newer than the one served here.
+    """
+    if shared_store is None:
+        return False
+    try:
+        snapshot = shared_store.latest("default_stocks", newer_than=snapshot_version)
+    except Exception as e:
+        logging.error(f"Error reading shared snapshot: {e}")
+        return False
+    if snapshot is None:
+        return False
+    version, created, data = snapshot
+    # Another thread may have applied this (or a newer) snapshot meanwhile
+    if not apply_results(data, created, version):
+        return False
+    logging.info(f"Loaded shared snapshot v{version}")
+    return True
+
 def refresh_default_stocks():
     """
     Periodically refresh the default list so the page remains current.
     """
-    global cached_results, last_refresh_time
     default_symbols = [
         "TSLA","NVDA","AAPL","GOOGL","AMZN","XRP",
         "MSFT","META","NFLX","BABA","BAC"
@@ -76,37 +149,30 @@ def refresh_default_stocks():
     try:
         print("Refreshing stock data...")
         
-        data = data_fetch.analyze_stocks(default_symbols)
+        data = pipeline.run(default_symbols, label="refresh")
+
+        # GPT summaries for every article, fetched concurrently (cached ones are free)
+        if config.SUMMARIZE_NEWS:
+            articles = [article for info in data.values() for article in info["news"]]
+            for article, gpt_summary in zip(articles, llm.summarize_articles(articles)):
+                if gpt_summary:
+                    article["gpt_summary"] = gpt_summary
+
         for sym, info in data.items():
-            # local sentiment
-            scores = []
-            for article in info["news"]:
-                txt = f"{article['title']}. {article['summary'] or ''}"
-                comp, lbl, _ = sentiment.analyze_sentiment(txt)
-                article["local_sentiment"] = lbl
-                article["local_compound"] = comp
-                scores.append(comp)
-            if scores:
-                avg_c = sum(scores)/len(scores)
-            else:
-                avg_c = 0
-            info["avg_sentiment"] = avg_c
-            if avg_c > 0.05:
-                info["sentiment_trend"] = "Bullish"
-            elif avg_c < -0.05:
-                info["sentiment_trend"] = "Bearish"
-            else:
-                info["sentiment_trend"] = "Neutral"
-            # risk
-            info["risk_level"] = sentiment.evaluate_risk(sym, info)
-            
             # Debug output
             print(f"Symbol: {sym}, Price: {info['price']}, Change: {info['change_pct']}%, News: {len(info['news'])}")
             if len(info['news']) > 0:
                 print(f"First news title: {info['news'][0]['title']}")
             
-        cached_results = data
-        last_refresh_time = time.time()
+        refreshed_at = time.time()
+        version = None
+        if shared_store is not None:
+            # Other workers pick this up instead of refreshing themselves
+            try:
+                version = shared_store.publish("default_stocks", data, refreshed_at)
+            except Exception as e:
+                logging.error(f"Error publishing shared snapshot: {e}")
+        apply_results(data, refreshed_at, version)
         logging.info("Default stock data refreshed.")
         print("Stock data refresh complete!")
         return True
@@ -116,19 +182,84 @@ def refresh_default_stocks():
         traceback.print_exc()
         return False
 
-# Start APScheduler
-scheduler.add_job(func=refresh_default_stocks, trigger="interval", minutes=30)
-scheduler.start()
+# Refreshes run in the background, one at a time; requests never wait for one
+refresher = jobs.BackgroundRefresh(
+    refresh_default_stocks,
+    retry_backoff=config.REFRESH_RETRY_BACKOFF,
+    retry_backoff_max=config.REFRESH_RETRY_BACKOFF_MAX
+)
+
+def data_freshness():
+    """
+    How old the cached default-stock data is, and whether a refresh is running.
+    """
+    age = round(time.time() - last_refresh_time) if last_refresh_time else None
+    return {
+        "last_refresh_time": last_refresh_time,
+        "age_seconds": age,
+        "stale": age is None or age > config.DATA_STALE_AFTER,
+        "refreshing": refresher.running
+    }
+
+def startup_refresh():
+    """
+    First refresh after start, optionally loading yfinance, the sentiment
+    model and the OpenAI client first.
+    """
+    if config.WARM_UP_ON_START:
+        warm_up_timings = warm_up()
+        print(f"Warm-up finished: {warm_up_timings}")
+    return refresh_default_stocks()
+
+def become_leader(reason):
+    """
+    Start the scheduler and, unless the shared snapshot is still fresh,
+    a background refresh.
+    """
+    sync_snapshot()
+    scheduler.start()
+    if not cached_results or data_freshness()["stale"]:
+        print("Starting initial data refresh in the background...")
+        refresher.start(reason, startup_refresh)
+
+def coordinate():
+    """
+    Shared-state loop run by every worker: followers load new snapshots and
+    take over if the leader exits; the leader serves refresh requests from
+    other workers and revalidates stale data.
+    """
+    while True:
+        time.sleep(config.SHARED_STATE_POLL_SECONDS)
+        try:
+            if not leader_lock.held:
+                if leader_lock.try_acquire():
+                    logging.info(f"Worker {os.getpid()} is now the refresh leader")
+                    become_leader("failover")
+                else:
+                    sync_snapshot()
+            elif shared_store.take_refresh_requests():
+                refresher.start("requested")
+            elif data_freshness()["stale"]:
+                refresher.revalidate("stale")
+        except Exception as e:
+            logging.error(f"Error in shared-state loop: {e}")
+
+# APScheduler (started by the leader only)
+scheduler.add_job(func=lambda: refresher.start("scheduled"), trigger="interval", minutes=30)
 
 @atexit.register
 def shutdown_scheduler():
-    scheduler.shutdown()
+    if scheduler.running:
+        scheduler.shutdown()
 
-# Force an initial refresh to make sure we have data on startup
-print("Performing initial data refresh on startup...")
-refresh_success = refresh_default_stocks()
-if not refresh_success:
-    print("Warning: Initial data refresh failed. The application will continue but data may be missing.")
+# Load the initial data in the background so the server accepts requests right away
+if leader_lock is None or leader_lock.try_acquire():
+    become_leader("startup")
+else:
+    print(f"Worker {os.getpid()} serves the leader's shared snapshots")
+    sync_snapshot()
+if shared_store is not None:
+    threading.Thread(target=coordinate, name="finsum-shared-state", daemon=True).start()
 
 # Add error handler
 @app.errorhandler(Exception)
@@ -140,18 +271,124 @@ def handle_exception(e):
 @app.route("/refresh")
 def refresh_data():
     """
-    Manual refresh endpoint
+    Manual refresh endpoint. Starts a background refresh (or joins the
+    running one) and returns at once: a job handle for JSON clients,
+    otherwise a redirect to the dashboard, which updates when it finishes.
     """
     try:
-        if refresh_default_stocks():
-            return redirect(url_for('index'))
+        if is_leader():
+            job, started = refresher.start("manual")
         else:
-            return "Error refreshing data. Please check logs and try again."
+            # Only the leader refreshes; queue a request for it
+            request_id, requested = shared_store.request_refresh("manual")
+            job, started = {"id": f"req-{request_id}", "reason": "manual", "status": "requested",
+                            "started": requested, "finished": None, "error": None}, True
+        if request.accept_mimetypes.best == "application/json" or request.args.get("format") == "json":
+            response = jsonify({"job": job, "started": started})
+            response.status_code = 202
+            response.headers["Location"] = url_for("refresh_status", job_id=job["id"])
+            return response
+        return redirect(url_for('index'))
     except Exception as e:
         logging.error(f"Exception in refresh route: {e}")
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
+@app.route("/refresh/<job_id>")
+def refresh_status(job_id):
+    """
+    Status of a refresh job started by /refresh
+    """
+    if job_id.startswith("req-") and shared_store is not None:
+        sync_snapshot()
+        req = shared_store.refresh_request(int(job_id[4:])) if job_id[4:].isdigit() else None
+        if req is None:
+            return jsonify({"error": "Unknown job"}), 404
+        if last_refresh_time and last_refresh_time >= req["requested"]:
+            status = "succeeded"
+        else:
+            status = "running" if req["handled"] else "requested"
+        job = {"id": job_id, "reason": req["reason"], "status": status,
+               "started": req["requested"], "finished": None, "error": None}
+    else:
+        job = refresher.job(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify({"job": job, "freshness": data_freshness()})
+
+@app.route("/stream")
+def stream():
+    """
+    Server-sent events with per-symbol updates from the scheduler.
+    Beyond config.STREAM_MAX_SUBSCRIBERS open streams this worker answers 503,
+    so page requests always have threads left; that dashboard then just
+    doesn't live-update.
+    """
+    q = broker.subscribe()
+    if q is None:
+        return Response("Too many open streams", status=503, headers={"Retry-After": "60"})
+    response = Response(
+        broker.stream(q, max_seconds=config.STREAM_MAX_SECONDS),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+    # Also frees the slot if the client leaves before the stream starts
+    response.call_on_close(lambda: broker.unsubscribe(q))
+    return response
+
+@app.route("/article/stream", methods=["POST"])
+def article_stream():
+    """
+    Server-sent events with summary (and answer) text for a pasted article,
+    relayed as the model generates it
+    """
+    article_text = request.form.get("article", "").strip()
+    user_question = request.form.get("user_question", "").strip()
+    if not article_text:
+        return jsonify({"error": "No article text provided"}), 400
+
+    def generate():
+        try:
+            for kind, piece in llm.stream_article(article_text, user_question or None):
+                yield events.format_sse(kind, {"text": piece})
+        except Exception as e:
+            logging.error(f"Error streaming article analysis: {e}")
+            yield events.format_sse("error", {"message": str(e)})
+        yield events.format_sse("done", {})
+
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.route("/stats")
+def stats():
+    """
+    Cache counters, provider health and refresh info for monitoring
+    """
+    return jsonify({
+        "last_refresh_time": last_refresh_time,
+        "freshness": data_freshness(),
+        "refresh_jobs": refresher.stats(),
+        "shared_state": {
+            "enabled": shared_store is not None,
+            "leader": is_leader(),
+            "pid": os.getpid(),
+            "snapshot_version": snapshot_version
+        },
+        "stream_subscribers": broker.subscriber_count(),
+        "stream_rejected": broker.rejected,
+        "startup": {"import_seconds": IMPORT_SECONDS, "lazy_loads": dict(load_timings)},
+        "caches": {
+            **data_fetch.cache_stats(),
+            "sentiment": sentiment.cache_stats(),
+            **llm.cache_stats()
+        },
+        "providers": data_fetch.provider_health(),
+        "pipeline": pipeline.stats()
+    })
+
 @app.route("/", methods=["GET","POST"])
 def index():
     try:
@@ -166,28 +403,7 @@ def index():
             if selected_stocks:
                 try:
                     print(f"Analyzing selected stocks: {selected_stocks}")
-                    raw_data = data_fetch.analyze_stocks(selected_stocks)
-                    for sym, info in raw_data.items():
-                        sc = []
-                        for art in info["news"]:
-                            text = f"{art['title']}. {art.get('summary','')}"
-                            comp, lbl, _ = sentiment.analyze_sentiment(text)
-                            art["local_sentiment"] = lbl
-                            art["local_compound"] = comp
-                            sc.append(comp)
-                        if sc:
-                            avg_comp = sum(sc)/len(sc)
-                        else:
-                            avg_comp = 0
-                        info["avg_sentiment"] = avg_comp
-                        if avg_comp > 0.05:
-                            info["sentiment_trend"] = "Bullish"
-                        elif avg_comp < -0.05:
-                            info["sentiment_trend"] = "Bearish"
-                        else:
-                            info["sentiment_trend"] = "Neutral"
-                        # risk
-                        info["risk_level"] = sentiment.evaluate_risk(sym, info)
+                    raw_data = pipeline.run(selected_stocks, label="interactive")
                     final["stocks"] = raw_data
                 except Exception as e:
                     logging.error(f"Error analyzing stocks: {e}")
@@ -197,17 +413,8 @@ def index():
             # If user pasted an article
             if article_text:
                 try:
-                    # Q&A
-                    if user_question:
-                        article_res = llm.analyze_text(article_text)
-                        ans = llm.answer_question(article_text, user_question)
-                        article_res["answer"] = ans
-                        article_res["question"] = user_question
-                        final["article"] = article_res
-                    else:
-                        # summary only
-                        article_res = llm.analyze_text(article_text)
-                        final["article"] = article_res
+                    # summary, plus Q&A if a question was asked (requested concurrently)
+                    final["article"] = llm.analyze_article(article_text, user_question or None)
                 except Exception as e:
                     logging.error(f"Error analyzing article: {e}")
                     print(f"Error analyzing article: {e}")
@@ -216,15 +423,26 @@ def index():
             return safe_render_template("index.html", results=final)
 
         # GET request => show default
-        # Check if we need a refresh (cached_results empty or more than 30 minutes old)
-        if not cached_results or (last_refresh_time and time.time() - last_refresh_time > 1800):
-            print("Cache is empty or stale, refreshing data...")
-            refresh_default_stocks()
-        
-        return safe_render_template("index.html", results={
+        # Serve what we have; if it's missing or stale, revalidate in the background
+        if not is_leader():
+            # The leader revalidates; just pick up its newest snapshot
+            sync_snapshot()
+        freshness = data_freshness()
+        if is_leader() and (not cached_results or freshness["stale"]):
+            job, started = refresher.revalidate("stale")
+            if started:
+                print("Cache is empty or stale, refreshing data in the background...")
+            freshness["refreshing"] = job is not None
+
+        response = app.make_response(safe_render_template("index.html", results={
             "stocks": cached_results,
-            "article": None
-        })
+            "article": None,
+            "freshness": freshness
+        }))
+        if freshness["age_seconds"] is not None:
+            response.headers["X-Data-Age"] = str(freshness["age_seconds"])
+        response.headers["X-Data-Stale"] = "1" if freshness["stale"] else "0"
+        return response
     except Exception as e:
         logging.error(f"Exception in index route: {e}")
         traceback.print_exc()
@@ -1 +1,14 @@
-# Finance app analysis module 
\ No newline at end of file
+# Finance app analysis module
+
+def warm_up():
+    """
+    Load everything the analysis modules defer to first use (yfinance/pandas,
+    the sentiment backend, the OpenAI client) ahead of the first request.
+    Returns the load time of each piece in seconds.
+    """
+    from . import data_fetch, sentiment, llm
+    from .lazy import load_timings
+    data_fetch.warm_up()
+    sentiment.warm_up()
+    llm.warm_up()
+    return dict(load_timings)
@@ -0,0 +1,191 @@
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+class TTLCache:
+    """
+    Small thread-safe in-memory cache.
+    - entries expire `ttl` seconds after they were stored (ttl=None => never)
+    - at most `maxsize` entries, least recently used ones are evicted first
+    - hit/miss/eviction counters for monitoring
+    """
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                # expired
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+def cached(cache, skip=None):
+    """
+    Decorator that memoizes a function's results in `cache`.
+    The key is the function name plus its arguments.
+    Results for which skip(result) is true (e.g. empty lists) are not stored.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (fn.__name__,) + args + tuple(sorted(kwargs.items()))
+            value = cache.get(key)
+            if value is not None:
+                return value
+            value = fn(*args, **kwargs)
+            if value is not None and not (skip and skip(value)):
+                cache.set(key, value)
+            return value
+        return wrapper
+    return decorator
+
+class _Call:
+    """
+    One in-flight call shared by SingleFlight callers.
+    """
+
+    def __init__(self):
+        self.done = False
+        self.result = None
+        self.error = None
+        self.pieces = []
+        self.cond = threading.Condition()
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls: while a call for `key` is running,
+    other callers with the same key wait for it and share its result (or
+    exception) instead of starting their own. Nothing is kept once it finishes;
+    pair it with a cache for that.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.coalesced = 0
+
+    def _join(self, key):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                return call, False
+            call = _Call()
+            self._calls[key] = call
+            self.calls += 1
+            return call, True
+
+    def _finish(self, key, call):
+        with self._lock:
+            self._calls.pop(key, None)
+        with call.cond:
+            call.done = True
+            call.cond.notify_all()
+
+    def do(self, key, fn):
+        """
+        Return fn(), run once for all concurrent callers with the same key.
+        """
+        call, leader = self._join(key)
+        if leader:
+            try:
+                call.result = fn()
+            except Exception as e:
+                call.error = e
+            finally:
+                self._finish(key, call)
+        else:
+            with call.cond:
+                while not call.done:
+                    call.cond.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stream(self, key, fn):
+        """
+        Iterate fn()'s pieces, with one generator shared by all concurrent
+        callers with the same key. Late joiners get the pieces produced so
+        far, then the rest as they arrive. The generator runs in its own
+        thread, so it finishes even if the first caller stops reading.
+        """
+        call, leader = self._join(key)
+        if leader:
+            def pump():
+                try:
+                    for piece in fn():
+                        with call.cond:
+                            call.pieces.append(piece)
+                            call.cond.notify_all()
+                except Exception as e:
+                    call.error = e
+                finally:
+                    self._finish(key, call)
+            threading.Thread(target=pump, name="finsum-singleflight", daemon=True).start()
+
+        index = 0
+        while True:
+            with call.cond:
+                while index >= len(call.pieces) and not call.done:
+                    call.cond.wait()
+                pieces = call.pieces[index:]
+                index += len(pieces)
+                finished = call.done
+            yield from pieces
+            if finished:
+                break
+        if call.error is not None:
+            raise call.error
+
+    def stats(self):
+        with self._lock:
+            return {"in_flight": len(self._calls), "calls": self.calls, "coalesced": self.coalesced}
@@ -0,0 +1,112 @@
+import importlib.util
+import zlib
+import math
+import re
+from collections import Counter
+
+from .lazy import Lazy
+
+TIKTOKEN_AVAILABLE = importlib.util.find_spec("tiktoken") is not None
+
+def _load_encoding():
+    import tiktoken
+    return tiktoken.get_encoding("cl100k_base")
+
+_encoding = Lazy("tiktoken", _load_encoding)
+
+def count_tokens(text):
+    """
+    Token count with tiktoken if installed, otherwise ~4 characters per token.
+    """
+    if TIKTOKEN_AVAILABLE:
+        return len(_encoding.get().encode(text))
+    return len(text) // 4 + 1
+
+def _pieces(text, max_tokens):
+    """
+    Paragraphs, with paragraphs over max_tokens split at sentence ends
+    (and sentences over max_tokens split by characters).
+    """
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if count_tokens(paragraph) <= max_tokens:
+            yield paragraph
+            continue
+        for sentence in re.split(r"(?<=[.!?])\s+", paragraph):
+            if count_tokens(sentence) <= max_tokens:
+                yield sentence
+                continue
+            width = max_tokens * 4
+            for start in range(0, len(sentence), width):
+                yield sentence[start:start + width]
+
+def split_chunks(text, max_tokens):
+    """
+    Split text into chunks of at most max_tokens, on paragraph boundaries.
+    Once a chunk is half full, it also ends after any paragraph whose hash
+    marks it as a boundary. Boundaries therefore depend on the paragraphs
+    themselves, not their position: editing one part of a document changes
+    only the chunks around the edit, and the other chunks (and their cached
+    summaries) stay the same.
+    """
+    chunks = []
+    current = []
+    size = 0
+    for piece in _pieces(text, max_tokens):
+        tokens = count_tokens(piece)
+        if current and size + tokens > max_tokens:
+            chunks.append("\n\n".join(current))
+            current, size = [], 0
+        current.append(piece)
+        size += tokens
+        if size >= max_tokens // 2 and zlib.crc32(piece.encode("utf-8")) % 4 == 0:
+            chunks.append("\n\n".join(current))
+            current, size = [], 0
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+def _terms(text):
+    return re.findall(r"[a-z0-9$%]+", text.lower())
+
+def rank_chunks(question, chunks):
+    """
+    Chunk indices ordered by relevance to the question (BM25 over the
+    question's terms), most relevant first.
+    """
+    query = set(_terms(question))
+    docs = [Counter(_terms(chunk)) for chunk in chunks]
+    if not docs:
+        return []
+    avg_len = sum(sum(doc.values()) for doc in docs) / len(docs) or 1
+    k1, b = 1.5, 0.75
+
+    scores = []
+    for doc in docs:
+        length = sum(doc.values())
+        score = 0.0
+        for term in query:
+            tf = doc.get(term, 0)
+            if not tf:
+                continue
+            df = sum(1 for other in docs if term in other)
+            idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+            score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / avg_len))
+        scores.append(score)
+    return sorted(range(len(chunks)), key=lambda i: (-scores[i], i))
+
+def select_chunks(question, chunks, max_tokens):
+    """
+    The most relevant chunks that fit in max_tokens, in document order.
+    """
+    chosen = []
+    used = 0
+    for i in rank_chunks(question, chunks):
+        tokens = count_tokens(chunks[i])
+        if used + tokens > max_tokens:
+            continue
+        chosen.append(i)
+        used += tokens
+    return [chunks[i] for i in sorted(chosen)]
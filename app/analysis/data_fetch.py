@@ -1,4 +1,3 @@
-import requests
 import datetime
 import sys
 import os
@@ -6,27 +5,68 @@ import json
 import logging
 import random
 import re
+import time
+import threading
+import collections
+import queue
+import importlib
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
 
 # Ensure the parent directory is in the path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 import config
+from .cache import TTLCache, cached
+from . import news_store
+from . import http_client
+from .providers import ProviderRegistry
+from . import fixtures
+from .lazy import Lazy
 
-# Try to import yfinance, but provide a fallback if it's not available
-try:
-    import yfinance as yf
+# yfinance (and the pandas/numpy it pulls in) is slow to import, so we only
+# check that it's installed here and import it on first use
+if importlib.util.find_spec("yfinance") is not None:
     YFINANCE_AVAILABLE = True
     print("yfinance is available and will be used for data fetching")
-except ImportError:
+else:
     YFINANCE_AVAILABLE = False
     logging.warning("yfinance package not available, using mock data")
     print("yfinance package not available, using mock data")
 
+# Price-history features need pandas/numpy (installed along with yfinance)
+FEATURES_AVAILABLE = all(importlib.util.find_spec(pkg) is not None for pkg in ("pandas", "numpy"))
+if not FEATURES_AVAILABLE:
+    logging.warning("pandas/numpy not available, price history features disabled")
+
+_yfinance = Lazy("yfinance", lambda: importlib.import_module("yfinance"))
+_features = Lazy("features", lambda: importlib.import_module(".features", __package__))
+
+def warm_up():
+    """
+    Import yfinance and the feature code now instead of on the first refresh.
+    """
+    if YFINANCE_AVAILABLE:
+        _yfinance.get()
+    if FEATURES_AVAILABLE:
+        _features.get()
+
+# Shared caches in front of the upstream quote/news calls.
+# Every caller (scheduler, /refresh, user requests) goes through these.
+quote_cache = TTLCache(maxsize=config.QUOTE_CACHE_SIZE, ttl=config.QUOTE_CACHE_TTL)
+news_cache = TTLCache(maxsize=config.NEWS_CACHE_SIZE, ttl=config.NEWS_CACHE_TTL)
+
+def cache_stats():
+    """
+    Hit/miss counters for the quote and news caches.
+    """
+    return {"quotes": quote_cache.stats(), "news": news_cache.stats()}
+
 def get_quote_yf(symbol):
     """
     Primary method: Get stock quote data from Yahoo Finance
     """
     try:
-        ticker = yf.Ticker(symbol)
+        ticker = _yfinance.get().Ticker(symbol, session=http_client.get_session())
         info = ticker.fast_info
         
         # For cryptocurrencies, the field names might be different
@@ -45,6 +85,15 @@ def get_quote_yf(symbol):
         print(f"Error fetching yfinance data for {symbol}: {e}")
         return None, None
 
+def _mock_random(symbol):
+    """
+    Random source for mock data. Seeded per symbol outside live mode,
+    so offline runs are reproducible.
+    """
+    if config.DATA_SOURCE == "live":
+        return random
+    return random.Random(f"{config.SYNTHETIC_SEED}:{symbol}:mock")
+
 def generate_mock_price(symbol):
     """
     Generate realistic mock prices for when yfinance fails
@@ -58,8 +107,9 @@ def generate_mock_price(symbol):
     
     mock_price = mock_prices.get(symbol, 100.0)  # Default to 100 if not in our list
     # Add some random variation (±3%)
-    mock_price = mock_price * (1 + random.uniform(-0.03, 0.03))
-    mock_change = random.uniform(-2.5, 2.5)  # Random change between -2.5% and 2.5%
+    rng = _mock_random(symbol)
+    mock_price = mock_price * (1 + rng.uniform(-0.03, 0.03))
+    mock_change = rng.uniform(-2.5, 2.5)  # Random change between -2.5% and 2.5%
     
     logging.info(f"Using mock data for {symbol}: ${round(mock_price, 2)}, change: {round(mock_change, 2)}%")
     print(f"Using mock data for {symbol}: ${round(mock_price, 2)}, change: {round(mock_change, 2)}%")
@@ -68,24 +118,210 @@ def generate_mock_price(symbol):
 
 def get_current_price(symbol):
     """
-    Try yfinance, fall back to mock data generation
+    Try the quote cache, then yfinance, fall back to mock data generation
     Returns (price, daily_change_pct).
     """
-    # First try yfinance
-    if YFINANCE_AVAILABLE:
-        price, change_pct = get_quote_yf(symbol)
-        if price is not None:
-            return price, change_pct
+    quote = quote_cache.get(symbol)
+    if quote is not None:
+        return quote
+
+    # First try yfinance (skipped while its circuit breaker is open)
+    _, quote = quote_providers.fetch(symbol)
+    if quote is not None:
+        quote_cache.set(symbol, quote)
+        return quote
     
     # If yfinance fails or is not available, use mock data
     return generate_mock_price(symbol)
 
+def _download_quotes_yf(symbols):
+    """
+    Fetch the last few daily bars for all symbols in one yfinance download
+    and derive (price, change_pct) from the last two closes.
+    Symbols with no usable data are left out of the result.
+    """
+    try:
+        data = _yfinance.get().download(
+            symbols,
+            period="5d",
+            interval="1d",
+            group_by="ticker",
+            auto_adjust=False,
+            session=http_client.get_session(),
+            threads=True,
+            progress=False
+        )
+    except Exception as e:
+        print(f"Error fetching batch quotes from yfinance: {e}")
+        logging.error(f"Error fetching batch quotes from yfinance: {e}")
+        return {}
+
+    if data is None or data.empty:
+        print("No batch quote data returned from yfinance")
+        return {}
+
+    quotes = {}
+    for sym in symbols:
+        try:
+            # Multiple tickers (and newer yfinance) => (ticker, field) columns
+            if data.columns.nlevels > 1:
+                closes = data[sym]["Close"]
+            else:
+                closes = data["Close"]
+            closes = closes.dropna()
+        except KeyError:
+            continue
+
+        # Need today's and the previous close to compute the daily change
+        if len(closes) < 2:
+            continue
+        price = float(closes.iloc[-1])
+        prev_close = float(closes.iloc[-2])
+        if not prev_close:
+            continue
+        change_pct = (price / prev_close - 1) * 100
+        # Full precision, like get_quote_yf; the template does the rounding
+        quotes[sym] = (price, change_pct)
+
+    print(f"yfinance batch quotes successful for {len(quotes)}/{len(symbols)} symbols")
+    return quotes
+
+def get_quotes_batch(symbols, fallback=True):
+    """
+    Get quotes for a whole list of symbols with a single upstream call.
+    Returns { symbol: (price, daily_change_pct) }.
+    Symbols missing from the batch fall back individually to get_current_price
+    (or are left out when fallback=False).
+    """
+    symbols = list(dict.fromkeys(symbols))
+    quotes = {}
+    missing = []
+    for sym in symbols:
+        quote = quote_cache.get(sym)
+        if quote is not None:
+            quotes[sym] = quote
+        else:
+            missing.append(sym)
+
+    if missing:
+        _, fetched = batch_quote_providers.fetch(missing)
+        fetched = fetched or {}
+        for sym, quote in fetched.items():
+            quote_cache.set(sym, quote)
+        quotes.update(fetched)
+
+    if fallback:
+        for sym in symbols:
+            if sym not in quotes:
+                quotes[sym] = get_current_price(sym)
+    return quotes
+
+def _download_history_yf(symbols, start):
+    """
+    Daily closes and volumes since `start` for all symbols in one yfinance download.
+    Returns two wide DataFrames (dates x symbols), or None.
+    """
+    try:
+        data = _yfinance.get().download(
+            symbols,
+            start=start.strftime("%Y-%m-%d"),
+            interval="1d",
+            group_by="column",
+            auto_adjust=False,
+            session=http_client.get_session(),
+            threads=True,
+            progress=False
+        )
+    except Exception as e:
+        print(f"Error fetching price history from yfinance: {e}")
+        logging.error(f"Error fetching price history from yfinance: {e}")
+        return None
+
+    if data is None or data.empty:
+        return None
+    if data.columns.nlevels > 1:
+        close, volume = data["Close"], data["Volume"]
+    else:
+        # Single ticker with flat columns
+        close = data[["Close"]].rename(columns={"Close": symbols[0]})
+        volume = data[["Volume"]].rename(columns={"Volume": symbols[0]})
+    return close, volume
+
+# Rolling daily history for every symbol seen so far (dates x symbols).
+# The first request for a symbol downloads the whole window; after that only
+# the newest bars are downloaded and merged in.
+_history = {"close": None, "volume": None}
+_history_lock = threading.Lock()
+
+def get_price_history(symbols):
+    """
+    Rolling window (config.HISTORY_WINDOW_DAYS trading days) of daily closes and
+    volumes for `symbols`, as two wide DataFrames. Returns (None, None) if no
+    history is available.
+    """
+    window = config.HISTORY_WINDOW_DAYS
+    today = datetime.date.today()
+    with _history_lock:
+        close = _history["close"]
+        known = [sym for sym in symbols if close is not None and sym in close.columns]
+        new = [sym for sym in symbols if sym not in known]
+        last_bar = close.index[-1].date() if known else None
+
+    downloads = []
+    if new:
+        # Calendar days that cover `window` trading days, plus holidays
+        downloads.append((new, today - datetime.timedelta(days=window * 7 // 5 + 10)))
+    if known:
+        # Re-fetch from the last stored bar: it may have been an intraday partial bar
+        downloads.append((known, last_bar))
+
+    # Download outside the lock, so concurrent callers don't queue behind the network
+    fetched = []
+    for batch, start in downloads:
+        _, result = history_providers.fetch(batch, start)
+        if result:
+            fetched.append(result)
+
+    with _history_lock:
+        close, volume = _history["close"], _history["volume"]
+        for new_close, new_volume in fetched:
+            if close is None:
+                close, volume = new_close, new_volume
+            else:
+                close = new_close.combine_first(close)
+                volume = new_volume.combine_first(volume)
+
+        if close is None:
+            return None, None
+        close = close.tail(window + 1)
+        volume = volume.tail(window + 1)
+        _history["close"], _history["volume"] = close, volume
+
+    present = [sym for sym in symbols if sym in close.columns]
+    return close[present], volume.reindex(columns=present)
+
+def get_history_features(symbols):
+    """
+    Volatility, drawdown, average volume and volume spike for every symbol,
+    computed in one vectorized pass over the price history.
+    Returns { symbol: { feature: value or None } } (empty if history is unavailable).
+    """
+    if not config.HISTORY_ENABLED or not FEATURES_AVAILABLE or not symbols:
+        return {}
+    close, volume = get_price_history(symbols)
+    if close is None or close.empty:
+        return {}
+    frame = _features.get().compute_history_features(close, volume, config.HISTORY_WINDOW_DAYS)
+    frame = frame.astype(object).where(frame.notna(), None)
+    return frame.to_dict("index")
+
+@cached(news_cache, skip=lambda news: not news)
 def get_news_yf(symbol, limit=5):
     """
     Get recent news for a stock from Yahoo Finance
     """
     try:
-        ticker = yf.Ticker(symbol)
+        ticker = _yfinance.get().Ticker(symbol, session=http_client.get_session())
         news = ticker.news
         
         if not news:
@@ -112,7 +348,8 @@ def get_news_yf(symbol, limit=5):
                 "summary": summary,
                 "url": link,
                 "av_score": sentiment_score,
-                "published": dt_pub
+                "published": dt_pub,
+                "provider_publish_time": published
             })
             
         print(f"Retrieved {len(results)} news items from Yahoo Finance for {symbol}")
@@ -122,6 +359,7 @@ def get_news_yf(symbol, limit=5):
         logging.error(f"Error fetching news from Yahoo Finance for {symbol}: {e}")
         return []
 
+@cached(news_cache, skip=lambda news: not news)
 def get_news_from_google(symbol, limit=5):
     """
     Get real news links from Google search results as a fallback
@@ -131,17 +369,14 @@ def get_news_from_google(symbol, limit=5):
         search_query = f"{symbol} stock news"
         url = "https://www.google.com/search"
         
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        
         params = {
             "q": search_query,
             "tbm": "nws",
             "num": limit
         }
         
-        response = requests.get(url, headers=headers, params=params)
+        # Pooled session with timeouts and retries (browser User-Agent is set on the session)
+        response = http_client.get(url, params=params)
         
         if response.status_code != 200:
             print(f"Failed to fetch Google search results for {symbol}, status code: {response.status_code}")
@@ -188,6 +423,63 @@ def get_news_from_google(symbol, limit=5):
         logging.error(f"Error fetching news from Google for {symbol}: {e}")
         return []
 
+# Provider fallback chains, each provider behind its own circuit breaker.
+# While a provider is failing, symbols skip straight to the next one.
+# config.DATA_SOURCE picks what's behind them:
+#   live      - Yahoo Finance / Google
+#   record    - live, and every response is saved under config.FIXTURE_DIR
+#   replay    - only the responses saved by a previous "record" run (no network)
+#   synthetic - seeded generator, any number of symbols (no network)
+quote_providers = ProviderRegistry("quotes")
+batch_quote_providers = ProviderRegistry("batch_quotes")
+news_providers = ProviderRegistry("news")
+history_providers = ProviderRegistry("history")
+_is_empty_quote = lambda quote: not quote or quote[0] is None
+_is_empty_history = lambda history: history is None or history[0].empty
+
+if config.DATA_SOURCE == "synthetic":
+    _market = fixtures.synthetic_market()
+    quote_providers.register("synthetic", _market.quote, is_empty=_is_empty_quote)
+    batch_quote_providers.register("synthetic", _market.quotes)
+    news_providers.register("synthetic", _market.news)
+    history_providers.register("synthetic", _market.history, is_empty=_is_empty_history)
+elif config.DATA_SOURCE == "replay":
+    _fixtures = fixtures.fixture_store()
+    quote_providers.register("replay", _fixtures.replayer("quote"), is_empty=_is_empty_quote)
+    batch_quote_providers.register("replay", _fixtures.batch_replayer("quote"))
+    news_providers.register("replay", _fixtures.replayer("news"))
+    history_providers.register("replay", _fixtures.history_replayer(), is_empty=_is_empty_history)
+else:
+    _record = (lambda kind, fetch: fetch)
+    _record_batch = _record
+    _record_history = (lambda fetch: fetch)
+    if config.DATA_SOURCE == "record":
+        _fixtures = fixtures.fixture_store()
+        _record = _fixtures.recorder
+        _record_batch = _fixtures.batch_recorder
+        _record_history = _fixtures.history_recorder
+    if YFINANCE_AVAILABLE:
+        quote_providers.register("yfinance", _record("quote", get_quote_yf), is_empty=_is_empty_quote)
+        batch_quote_providers.register("yfinance", _record_batch("quote", _download_quotes_yf))
+        news_providers.register("yfinance", _record("news", get_news_yf))
+        history_providers.register("yfinance", _record_history(_download_history_yf), is_empty=_is_empty_history)
+    news_providers.register("google", _record("news", get_news_from_google))
+
+# Separate pool for hedged news requests, so they never wait behind the
+# per-symbol fetch workers that are blocked on them
+_hedge_executor = ThreadPoolExecutor(
+    max_workers=config.NEWS_HEDGE_WORKERS, thread_name_prefix="finsum-hedge"
+)
+
+def provider_health():
+    """
+    Circuit breaker state and error rates for every registered provider.
+    """
+    return {
+        registry.kind: registry.health()
+        for registry in (quote_providers, batch_quote_providers, news_providers, history_providers)
+    }
+
 def get_real_news_urls(symbol):
     """
     Get real news URLs for financial news based on the stock symbol
@@ -342,6 +634,7 @@ def generate_mock_news(symbol):
     real_urls = get_real_news_urls(symbol)
     
     # Generate 5 news items (or as many as we have templates for)
+    rng = _mock_random(symbol)
     mock_news = []
     for i in range(min(5, len(templates))):
         template = templates[i]
@@ -349,7 +642,7 @@ def generate_mock_news(symbol):
         date = current_date - datetime.timedelta(days=days_ago)
         
         # Add some randomness to sentiment
-        sentiment = template["sentiment"] + random.uniform(-0.1, 0.1)
+        sentiment = template["sentiment"] + rng.uniform(-0.1, 0.1)
         sentiment = max(-1.0, min(1.0, sentiment))  # Ensure it's between -1 and 1
         
         # Use a real URL based on the available URLs for this symbol
@@ -366,48 +659,183 @@ def generate_mock_news(symbol):
     
     return mock_news
 
-def analyze_stocks(symbols, use_newsapi=False):
+def _fetch_news(sym):
+    """
+    Walk the news provider chain (Yahoo Finance, then Google News).
+    With config.NEWS_HEDGE_ENABLED the providers are raced instead: Google is
+    started if Yahoo hasn't answered within NEWS_HEDGE_DELAY, and the symbol
+    gives up after NEWS_SYMBOL_DEADLINE.
+    Falls back to the last stored news, then mock news with real URLs.
+    Returns (source, news_items).
+    """
+    if config.NEWS_HEDGE_ENABLED:
+        source, news_items = news_providers.fetch_hedged(
+            _hedge_executor, sym, limit=config.NEWS_FETCH_LIMIT,
+            hedge_delay=config.NEWS_HEDGE_DELAY,
+            deadline=config.NEWS_SYMBOL_DEADLINE
+        )
+    else:
+        source, news_items = news_providers.fetch(sym, limit=config.NEWS_FETCH_LIMIT)
+    if news_items:
+        logging.info(f"Successfully retrieved news from {source} for {sym}")
+        return source, news_items
+
+    # Every provider failed, is circuit-broken or ran out of time
+    return _last_known_news(sym)
+
+def _last_known_news(sym):
+    """
+    The newest stored news for `sym` if there is any, otherwise mock news with real URLs.
+    Returns (source, news_items).
+    """
+    if config.NEWS_STORE_ENABLED:
+        stored = news_store.recent_articles(sym, limit=config.NEWS_DISPLAY_LIMIT)
+        if stored:
+            logging.info(f"Using stored news for {sym}")
+            return "store", stored
+    return "mock", generate_mock_news(sym)
+
+def _stored_news(sym, source, news_items):
+    """
+    Add freshly fetched articles to the persistent news store and read the
+    newest ones back, so the page can show more than a single fetch returns.
+    Mock news is never stored.
+    """
+    if not config.NEWS_STORE_ENABLED or source in ("mock", "store"):
+        return news_items
+    news_store.store_articles(sym, news_items, source=source)
+    stored = news_store.recent_articles(sym, limit=config.NEWS_DISPLAY_LIMIT)
+    return stored or news_items
+
+def _analyze_symbol(sym, quote=None):
+    """
+    Gather price, daily change and news for a single symbol.
+    `quote` is a (price, change_pct) pair from the batch download, if any.
+    """
+    stock_info = {}
+    p, c = quote or get_current_price(sym)
+    stock_info["price"] = p
+    stock_info["change_pct"] = c
+    logging.info(f"Retrieved price for {sym}: {p}, change: {c}%")
+
+    source, news_items = _fetch_news(sym)
+    news_items = _stored_news(sym, source, news_items)
+    # Copy the articles: callers annotate them, and the originals live in news_cache
+    news_items = [dict(article) for article in news_items]
+    logging.info(f"Total news items for {sym}: {len(news_items)}")
+    stock_info["news"] = news_items
+    return stock_info
+
+def _fallback_symbol(sym, quote=None):
+    """
+    Mock price and last known news, used when a symbol misses its deadline or errors out.
+    """
+    p, c = quote or generate_mock_price(sym)
+    _, news_items = _last_known_news(sym)
+    return {"price": p, "change_pct": c, "news": [dict(article) for article in news_items]}
+
+def _analyze_concurrently(symbols, quotes, max_workers, timeout):
+    """
+    Run _analyze_symbol for up to `max_workers` symbols at a time, one thread each.
+    Each symbol gets `timeout` seconds from the moment its thread starts;
+    symbols that miss the deadline or raise get mock data instead. A timed-out
+    thread is abandoned (it finishes on its own and its result is dropped) and
+    its slot goes to the next queued symbol, so hung symbols can't hold up the rest.
+    Yields (symbol, info) as each symbol finishes.
+    """
+    results = queue.Queue()
+    waiting = collections.deque(symbols)
+    running = {}
+    # Hard stop for the whole batch
+    rounds = -(-len(symbols) // max_workers)
+    batch_deadline = time.monotonic() + timeout * (rounds + 1)
+
+    def run(sym):
+        try:
+            results.put((sym, _analyze_symbol(sym, quotes.get(sym)), None))
+        except Exception as e:
+            results.put((sym, None, e))
+
+    def start_waiting():
+        while waiting and len(running) < max_workers:
+            sym = waiting.popleft()
+            running[sym] = time.monotonic()
+            threading.Thread(target=run, args=(sym,), name=f"finsum-fetch-{sym}", daemon=True).start()
+
+    start_waiting()
+    while running:
+        # Wake up at the earliest deadline among the running symbols
+        wait_for = min(min(running.values()) + timeout, batch_deadline) - time.monotonic()
+        try:
+            sym, info, error = results.get(timeout=max(0.0, wait_for))
+        except queue.Empty:
+            sym = None
+        # Results of abandoned threads are no longer in `running`
+        if sym in running:
+            del running[sym]
+            if error is not None:
+                logging.error(f"Error analyzing {sym}: {error}")
+                print(f"Error analyzing {sym}: {error}")
+                info = _fallback_symbol(sym, quotes.get(sym))
+            yield sym, info
+
+        now = time.monotonic()
+        for sym, started in list(running.items()):
+            if now >= batch_deadline or now - started >= timeout:
+                logging.warning(f"Fetching {sym} exceeded {timeout}s, using mock data")
+                print(f"Fetching {sym} exceeded {timeout}s, using mock data")
+                del running[sym]
+                yield sym, _fallback_symbol(sym, quotes.get(sym))
+        if now >= batch_deadline:
+            while waiting:
+                sym = waiting.popleft()
+                logging.warning(f"{sym} not started before batch deadline, using mock data")
+                print(f"{sym} not started before batch deadline, using mock data")
+                yield sym, _fallback_symbol(sym, quotes.get(sym))
+        start_waiting()
+
+def iter_stocks(symbols, max_workers=None):
+    """
+    Price and news for each symbol, yielded as (symbol, info) as soon as that
+    symbol is ready (completion order, not input order). Quotes come from one
+    batched download; news is fetched with up to config.FETCH_MAX_WORKERS
+    threads (override with max_workers; 1 = sequential).
+    History features are not included, see get_history_features.
+    """
+    unique_symbols = list(dict.fromkeys(symbols))
+    if max_workers is None:
+        max_workers = config.FETCH_MAX_WORKERS
+    max_workers = max(1, min(max_workers, len(unique_symbols) or 1))
+
+    # One batched quote download for the whole list; misses are retried per symbol below
+    quotes = get_quotes_batch(unique_symbols, fallback=False)
+
+    if max_workers == 1:
+        for sym in unique_symbols:
+            yield sym, _analyze_symbol(sym, quotes.get(sym))
+    else:
+        yield from _analyze_concurrently(unique_symbols, quotes, max_workers, config.FETCH_SYMBOL_TIMEOUT)
+
+def analyze_stocks(symbols, use_newsapi=False, max_workers=None):
     """
     Main method to gather:
-    1) Price & daily change
+    1) Price & daily change (one batched download, per-symbol fallback)
     2) News from Yahoo Finance or mock data
-    Return a dict { symbol: { price, change_pct, news: [...] } }
+    3) Volatility, drawdown and volume features from daily history
+    Return a dict { symbol: { price, change_pct, news: [...], volatility, ... } }
+    in the same order as `symbols`.
+
+    Symbols are fetched in parallel with up to config.FETCH_MAX_WORKERS
+    threads (override with max_workers; 1 = sequential).
     """
-    results = {}
     logging.info(f"Starting analysis for symbols: {symbols}")
-    for sym in symbols:
-        stock_info = {}
-        p, c = get_current_price(sym)
-        stock_info["price"] = p
-        stock_info["change_pct"] = c
-        logging.info(f"Retrieved price for {sym}: {p}, change: {c}%")
-
-        # Try to get news from Yahoo Finance first
-        if YFINANCE_AVAILABLE:
-            yf_news = get_news_yf(sym, limit=5)
-            if yf_news:
-                news_items = yf_news
-                logging.info(f"Successfully retrieved news from Yahoo Finance for {sym}")
-            else:
-                # If no Yahoo Finance news, try Google News as a fallback
-                google_news = get_news_from_google(sym, limit=5)
-                if google_news:
-                    news_items = google_news
-                    logging.info(f"Successfully retrieved news from Google for {sym}")
-                else:
-                    # If Google News fails too, use mock news with real URLs
-                    news_items = generate_mock_news(sym)
-        else:
-            # No yfinance available, try Google News
-            google_news = get_news_from_google(sym, limit=5)
-            if google_news:
-                news_items = google_news
-                logging.info(f"Successfully retrieved news from Google for {sym}")
-            else:
-                # If Google News fails too, use mock news with real URLs
-                news_items = generate_mock_news(sym)
-        
-        logging.info(f"Total news items for {sym}: {len(news_items)}")
-        stock_info["news"] = news_items
-        results[sym] = stock_info
-    return results 
\ No newline at end of file
+    unique_symbols = list(dict.fromkeys(symbols))
+    fetched = dict(iter_stocks(unique_symbols, max_workers))
+
+    # Volatility/drawdown/volume features for the whole list in one pass
+    history_features = get_history_features(unique_symbols)
+    for sym, values in history_features.items():
+        fetched[sym].update(values)
+
+    # Preserve input order
+    return {sym: fetched[sym] for sym in unique_symbols}
@@ -0,0 +1,145 @@
+import zlib
+import re
+import sys
+import os
+
+# Ensure the parent directory is in the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+import config
+
+# Mersenne prime for the MinHash permutations (a * x + b) mod P
+_PRIME = (1 << 61) - 1
+
+# Summaries made up by the news providers (data_fetch.get_news_from_google,
+# generate_mock_news): the same sentence for every article of a symbol, so
+# they say nothing about whether two stories are the same
+_TEMPLATE_SUMMARY = re.compile(
+    r"^Latest (financial )?news (and analysis )?about \S+( from \S+| relevant to investors and market watchers\.?)$"
+)
+
+def title_symbols(title):
+    """
+    All-caps words in a title (tickers such as TSLA, acronyms such as CEO).
+    """
+    return frozenset(re.findall(r"\b[A-Z][A-Z0-9.]{1,5}\b", title or ""))
+
+def is_template_summary(title, summary):
+    """
+    True if the summary is empty, repeats the title or is a provider template.
+    """
+    summary = (summary or "").strip()
+    return not summary or summary == (title or "").strip() or bool(_TEMPLATE_SUMMARY.match(summary))
+
+def shingles(text, size=None):
+    """
+    Set of word n-grams (hashed to 32 bits) of the normalized text.
+    Texts shorter than `size` words give a single shingle of all their words.
+    """
+    size = size or config.DEDUP_SHINGLE_SIZE
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    if not words:
+        return set()
+    if len(words) < size:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))}
+    return {
+        zlib.crc32(" ".join(words[i:i + size]).encode("utf-8"))
+        for i in range(len(words) - size + 1)
+    }
+
+class NearDuplicateIndex:
+    """
+    Incremental MinHash/LSH index for clustering near-duplicate articles
+    (the same wire story under several tickers or sources).
+    add() returns the id of the cluster the article joins: the position of
+    the cluster's first member, or the new article's own position if nothing
+    similar was seen. An article joins a cluster when the estimated Jaccard
+    similarity of its title shingles to the first member's is at least
+    `title_threshold`, both titles name the same tickers (so "AAPL Beats
+    Estimates" and "MSFT Beats Estimates" stay apart) and, if both have a
+    real summary (not a provider template), the similarity of title+summary
+    is at least `threshold`.
+    Not thread-safe; use one index per batch from one thread.
+    """
+
+    def __init__(self, threshold=None, title_threshold=None, num_perm=None, bands=None, seed=1):
+        import numpy as np
+        self.threshold = config.DEDUP_THRESHOLD if threshold is None else threshold
+        self.title_threshold = config.DEDUP_TITLE_THRESHOLD if title_threshold is None else title_threshold
+        self.num_perm = num_perm or config.DEDUP_NUM_PERM
+        self.bands = bands or config.DEDUP_BANDS
+        self.rows = self.num_perm // self.bands
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, _PRIME, size=self.num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, _PRIME, size=self.num_perm, dtype=np.uint64)
+        self._buckets = [{} for _ in range(self.bands)]
+        self._signatures = []
+        self._clusters = []
+
+    def signature(self, text):
+        import numpy as np
+        hashes = np.fromiter(shingles(text), dtype=np.uint64)
+        if not len(hashes):
+            return None
+        # One row per permutation, one column per shingle; keep the minimum.
+        # a * x + b wraps around at 2**64, which still mixes well (as in datasketch).
+        # The constants must be uint64 too, or numpy falls back to float64
+        with np.errstate(over="ignore"):
+            permuted = (np.outer(self._a, hashes) + self._b[:, None]) % np.uint64(_PRIME)
+        return (permuted & np.uint64(0xFFFFFFFF)).min(axis=1)
+
+    def add(self, title, summary=""):
+        position = len(self._clusters)
+        signature = self.signature(title or "")
+        full = None
+        if signature is not None and not is_template_summary(title, summary):
+            full = self.signature(f"{title}. {summary}")
+        symbols = title_symbols(title)
+        self._signatures.append((signature, full, symbols))
+        if signature is None:
+            # Nothing to compare (empty title): its own cluster
+            self._clusters.append(position)
+            return position
+
+        band_keys = [
+            signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            for band in range(self.bands)
+        ]
+        candidates = set()
+        for band, key in enumerate(band_keys):
+            candidates.update(self._buckets[band].get(key, ()))
+
+        cluster = position
+        for candidate in sorted(candidates):
+            representative = self._clusters[candidate]
+            other, other_full, other_symbols = self._signatures[representative]
+            if other_symbols != symbols or (other == signature).mean() < self.title_threshold:
+                continue
+            if full is not None and other_full is not None and (other_full == full).mean() < self.threshold:
+                continue
+            cluster = representative
+            break
+
+        self._clusters.append(cluster)
+        for band, key in enumerate(band_keys):
+            self._buckets[band].setdefault(key, []).append(position)
+        return cluster
+
+    def __len__(self):
+        return len(self._clusters)
+
+    def cluster_count(self):
+        return len(set(self._clusters))
+
+def cluster(articles):
+    """
+    Cluster id for each article dict (title plus content or summary; see
+    NearDuplicateIndex.add), in one pass.
+    With config.DEDUP_ENABLED off every article is its own cluster.
+    """
+    if not config.DEDUP_ENABLED:
+        return list(range(len(articles)))
+    index = NearDuplicateIndex()
+    return [
+        index.add(art.get("title", ""), art.get("content") or art.get("summary") or "")
+        for art in articles
+    ]
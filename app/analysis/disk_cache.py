@@ -0,0 +1,221 @@
+import sqlite3
+import threading
+import logging
+import json
+import time
+import os
+from contextlib import closing
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_last_used ON entries (last_used);
+CREATE INDEX IF NOT EXISTS idx_entries_created ON entries (created);
+-- Entry count and total size, kept up to date by triggers so eviction
+-- never has to scan the table
+CREATE TABLE IF NOT EXISTS totals (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    entries INTEGER NOT NULL,
+    bytes INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+    UPDATE totals SET entries = entries + 1, bytes = bytes + new.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+    UPDATE totals SET entries = entries - 1, bytes = bytes - old.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_update AFTER UPDATE OF size ON entries BEGIN
+    UPDATE totals SET bytes = bytes - old.size + new.size WHERE id = 0;
+END;
+-- Files created before the totals table: count once
+INSERT OR IGNORE INTO totals (id, entries, bytes)
+    SELECT 0, COUNT(*), COALESCE(SUM(size), 0) FROM entries;
+"""
+
+class DiskCache:
+    """
+    Persistent key -> JSON value cache in a SQLite file, shared by every
+    process and worker that opens the same path.
+    - WAL mode + busy timeout: readers don't block the writer, and
+      concurrent writers wait instead of failing
+    - bounded by entry count and/or total value bytes; least recently
+      used entries are evicted first. Reads only write back last_used once
+      it is more than `touch_interval` seconds old, so cache hits rarely
+      take SQLite's write lock (LRU order is accurate to that interval)
+    - optional ttl (seconds) after which entries are ignored and dropped
+    Errors are logged and treated as misses, so a broken cache file never
+    breaks scoring.
+    """
+
+    def __init__(self, path, max_entries=None, max_bytes=None, ttl=None, touch_interval=300):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.touch_interval = touch_interval
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        if not self._initialized:
+            with self._lock:
+                if not self._initialized:
+                    os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                    with closing(sqlite3.connect(self.path, timeout=10)) as conn:
+                        conn.execute("PRAGMA journal_mode=WAL")
+                        conn.executescript(SCHEMA)
+                        conn.commit()
+                    self._initialized = True
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _count(self, hits, misses):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def get_many(self, keys):
+        """
+        Returns {key: value} for the keys that are cached (and not expired).
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        found = {}
+        now = time.time()
+        try:
+            with closing(self._connect()) as conn:
+                with conn:
+                    # SQLite limits bound parameters, so look keys up in chunks
+                    for start in range(0, len(keys), 500):
+                        chunk = keys[start:start + 500]
+                        marks = ",".join("?" * len(chunk))
+                        rows = conn.execute(
+                            f"SELECT key, value, created, last_used FROM entries WHERE key IN ({marks})",
+                            chunk
+                        ).fetchall()
+                        touch = []
+                        for key, value, created, last_used in rows:
+                            if self.ttl is not None and created + self.ttl < now:
+                                continue
+                            found[key] = json.loads(value)
+                            if last_used < now - self.touch_interval:
+                                touch.append(key)
+                        if touch:
+                            conn.execute(
+                                f"UPDATE entries SET last_used = ? "
+                                f"WHERE key IN ({','.join('?' * len(touch))})",
+                                [now] + touch
+                            )
+        except (sqlite3.Error, ValueError) as e:
+            logging.error(f"Disk cache read failed ({self.path}): {e}")
+            found = {}
+        self._count(len(found), len(keys) - len(found))
+        return found
+
+    def get(self, key, default=None):
+        return self.get_many([key]).get(key, default)
+
+    def set_many(self, items):
+        """
+        Store {key: value} (JSON-serializable values), then evict down to the bounds.
+        """
+        if not items:
+            return
+        now = time.time()
+        rows = []
+        for key, value in items.items():
+            payload = json.dumps(value)
+            rows.append((key, payload, len(payload), now, now))
+        try:
+            with closing(self._connect()) as conn:
+                with conn:
+                    # An upsert rather than INSERT OR REPLACE, whose implicit
+                    # delete would skip the totals trigger
+                    conn.executemany(
+                        "INSERT INTO entries (key, value, size, created, last_used) "
+                        "VALUES (?, ?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET "
+                        "value = excluded.value, size = excluded.size, "
+                        "created = excluded.created, last_used = excluded.last_used",
+                        rows
+                    )
+                    self._evict(conn, now)
+        except sqlite3.Error as e:
+            logging.error(f"Disk cache write failed ({self.path}): {e}")
+
+    def set(self, key, value):
+        self.set_many({key: value})
+
+    def _totals(self, conn):
+        row = conn.execute("SELECT entries, bytes FROM totals WHERE id = 0").fetchone()
+        return row if row else (0, 0)
+
+    def _evict(self, conn, now):
+        evicted = 0
+        if self.ttl is not None:
+            evicted += conn.execute(
+                "DELETE FROM entries WHERE created < ?", (now - self.ttl,)
+            ).rowcount
+        if self.max_entries is not None:
+            count = self._totals(conn)[0]
+            if count > self.max_entries:
+                evicted += conn.execute(
+                    "DELETE FROM entries WHERE key IN "
+                    "(SELECT key FROM entries ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,)
+                ).rowcount
+        if self.max_bytes is not None:
+            total = self._totals(conn)[1]
+            if total > self.max_bytes:
+                # Walk from least recently used until enough bytes are freed
+                excess = total - self.max_bytes
+                victims = []
+                for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_used"):
+                    victims.append((key,))
+                    excess -= size
+                    if excess <= 0:
+                        break
+                conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+                evicted += len(victims)
+        if evicted:
+            with self._lock:
+                self.evictions += evicted
+
+    def clear(self):
+        try:
+            with closing(self._connect()) as conn:
+                with conn:
+                    conn.execute("DELETE FROM entries")
+        except sqlite3.Error as e:
+            logging.error(f"Disk cache clear failed ({self.path}): {e}")
+
+    def stats(self):
+        size = entries = None
+        try:
+            with closing(self._connect()) as conn:
+                entries, size = self._totals(conn)
+        except sqlite3.Error as e:
+            logging.error(f"Disk cache stats failed ({self.path}): {e}")
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "path": self.path,
+                "entries": entries,
+                "bytes": size,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0
+            }
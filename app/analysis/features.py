@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+# Trading days per year, to annualize daily volatility
+TRADING_DAYS = 252
+
+def compute_history_features(close, volume, window):
+    """
+    Price/volume features for a whole watchlist at once.
+    `close` and `volume` are wide DataFrames (dates x symbols); every feature is a
+    column-wise array operation, so the cost doesn't depend on Python loops per symbol.
+    Returns a DataFrame indexed by symbol with:
+    - volatility: annualized realized volatility of daily log returns, in %
+    - drawdown: last close vs. the highest close in the window, in %
+    - avg_volume: mean daily volume over the window (excluding the last bar)
+    - volume_spike: last bar's volume / avg_volume
+    """
+    close = close.tail(window + 1)
+    volume = volume.reindex(columns=close.columns).tail(window + 1)
+
+    returns = np.log(close).diff()
+    volatility = returns.std() * np.sqrt(TRADING_DAYS) * 100
+
+    last_close = close.ffill().iloc[-1]
+    drawdown = (last_close / close.max() - 1) * 100
+
+    avg_volume = volume.iloc[:-1].mean()
+    volume_spike = volume.iloc[-1] / avg_volume.replace(0, np.nan)
+
+    features = pd.DataFrame({
+        "volatility": volatility,
+        "drawdown": drawdown,
+        "avg_volume": avg_volume,
+        "volume_spike": volume_spike
+    })
+    return features.replace([np.inf, -np.inf], np.nan).round(2)
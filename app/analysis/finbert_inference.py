@@ -1,41 +1,271 @@
+import time
 import sys
 import os
 
 # Ensure the parent directory is in the path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 import config
+from .lazy import Lazy
 
-if config.USE_FINBERT:
-    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+MODEL_NAME = "ProsusAI/finbert"
+
+# Bumped when scores of the same model change meaning (2: labels are read
+# from the model config instead of a hard-coded index order), so cached
+# scores from before are not served
+SCORE_VERSION = 2
+
+# config.FINBERT_BACKEND values:
+#   torch      - PyTorch FP32 (reference)
+#   torch-int8 - PyTorch with Linear layers dynamically quantized to int8
+#   onnx       - ONNX Runtime on CPU, FP32 graph exported from the PyTorch model
+#   onnx-int8  - ONNX Runtime on CPU, dynamically int8-quantized graph
+BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+
+def model_version():
+    """
+    Identifies the model + backend, so cached scores from one backend
+    are never served for another.
+    """
+    return f"{MODEL_NAME}:{config.FINBERT_BACKEND}:v{SCORE_VERSION}"
+
+def _load_labels():
+    """
+    Label for each logit index, from the model's own config (for
+    ProsusAI/finbert 0=positive, 1=negative, 2=neutral). The ONNX graph keeps
+    the logit order of the model it was exported from.
+    """
+    from transformers import AutoConfig
+    id2label = AutoConfig.from_pretrained(MODEL_NAME).id2label
+    return [id2label[i].capitalize() for i in range(len(id2label))]
+
+def _load_tokenizer():
+    from transformers import AutoTokenizer
+    return AutoTokenizer.from_pretrained(MODEL_NAME)
+
+def _load_torch_model(quantize=False):
+    from transformers import AutoModelForSequenceClassification
     import torch
 
-    MODEL_NAME = "ProsusAI/finbert"
+    # Intra-op threads for CPU inference (0 => let torch decide)
+    if config.FINBERT_NUM_THREADS > 0:
+        torch.set_num_threads(config.FINBERT_NUM_THREADS)
 
-    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
     model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME)
     model.eval()
+    if quantize:
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+def export_onnx(path, tokenizer):
+    """
+    Export the FP32 PyTorch model to an ONNX graph with dynamic batch/sequence axes.
+    """
+    import torch
+
+    model = _load_torch_model()
+    sample = tokenizer(["FinBERT export sample"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            path,
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14
+        )
+    print(f"Exported FinBERT to ONNX at {path}")
+
+def _onnx_path(quantize):
+    path = config.FINBERT_ONNX_PATH
+    if quantize:
+        root, ext = os.path.splitext(path)
+        return f"{root}.int8{ext}"
+    return path
+
+def _load_onnx_session(tokenizer, quantize=False):
+    """
+    ONNX Runtime session for the exported graph, exporting (and quantizing)
+    it first if the file doesn't exist yet.
+    """
+    import onnxruntime as ort
+
+    fp32_path = _onnx_path(False)
+    if not os.path.exists(fp32_path):
+        export_onnx(fp32_path, tokenizer)
+    path = fp32_path
+    if quantize:
+        path = _onnx_path(True)
+        if not os.path.exists(path):
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+            quantize_dynamic(fp32_path, path, weight_type=QuantType.QInt8)
+            print(f"Quantized FinBERT ONNX graph to {path}")
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if config.FINBERT_NUM_THREADS > 0:
+        options.intra_op_num_threads = config.FINBERT_NUM_THREADS
+    return ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+
+def _build_predictor(backend, tokenizer):
+    """
+    Returns predict(batch_items) -> list of per-label probabilities (in the
+    order of _load_labels()) for a list of un-padded tokenizer outputs.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown FINBERT_BACKEND {backend!r}, expected one of {BACKENDS}")
+
+    if backend.startswith("onnx"):
+        import numpy as np
+        session = _load_onnx_session(tokenizer, quantize=backend == "onnx-int8")
+        input_names = {inp.name for inp in session.get_inputs()}
+
+        def predict(batch_items):
+            inputs = tokenizer.pad(batch_items, return_tensors="np")
+            feed = {name: values.astype(np.int64) for name, values in inputs.items() if name in input_names}
+            logits = session.run(None, feed)[0]
+            exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+            return (exp / exp.sum(axis=1, keepdims=True)).tolist()
+        return predict
+
+    import torch
+    model = _load_torch_model(quantize=backend == "torch-int8")
+
+    def predict(batch_items):
+        inputs = tokenizer.pad(batch_items, return_tensors="pt")
+        with torch.inference_mode():
+            logits = model(**inputs).logits
+        return torch.softmax(logits, dim=1).tolist()
+    return predict
+
+def _load_model():
+    """
+    Load the tokenizer, labels and the configured backend.
+    Returns (tokenizer, predict, labels).
+    """
+    tokenizer = _load_tokenizer()
+    return tokenizer, _build_predictor(config.FINBERT_BACKEND, tokenizer), _load_labels()
+
+# Loaded on the first call (or warm_up()), not at import time
+_finbert = Lazy("finbert", _load_model)
+
+def warm_up():
+    if config.USE_FINBERT:
+        _finbert.get()
+
+def _micro_batches(lengths):
+    """
+    Group text indices into micro-batches, shortest texts first.
+    A batch is closed when adding the next text would push its padded size
+    (longest text x number of texts) over config.FINBERT_MAX_BATCH_TOKENS,
+    or when it reaches config.FINBERT_MAX_BATCH_SIZE texts.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    batch = []
+    longest = 0
+    for i in order:
+        longest_with_i = max(longest, lengths[i])
+        if batch and (
+            longest_with_i * (len(batch) + 1) > config.FINBERT_MAX_BATCH_TOKENS
+            or len(batch) >= config.FINBERT_MAX_BATCH_SIZE
+        ):
+            yield batch
+            batch = []
+            longest_with_i = lengths[i]
+        batch.append(i)
+        longest = longest_with_i
+    if batch:
+        yield batch
+
+def _predict_batched(texts, tokenizer, predict):
+    """
+    Tokenize once without padding, run length-sorted micro-batches and
+    scatter the probabilities back to input order.
+    """
+    encodings = tokenizer(list(texts), truncation=True, max_length=512)
+    items = [
+        {key: values[i] for key, values in encodings.items()}
+        for i in range(len(texts))
+    ]
+    lengths = [len(item["input_ids"]) for item in items]
+
+    probs = [None] * len(texts)
+    for batch in _micro_batches(lengths):
+        for i, row in zip(batch, predict([items[i] for i in batch])):
+            probs[i] = row
+    return probs
+
+def _to_label(row, labels):
+    label_idx = row.index(max(row))
+    return labels[label_idx], max(row)
+
+def finbert_sentiment_batch(texts):
+    """
+    Batched FinBERT inference with the backend from config.FINBERT_BACKEND.
+    Texts are tokenized once without padding, sorted by token length and packed
+    into micro-batches that are only padded to their own longest text.
+    Returns a list of (label, score) in input order.
+    """
+    if not config.USE_FINBERT:
+        return [(None, None)] * len(texts)
+    if not texts:
+        return []
+
+    tokenizer, predict, labels = _finbert.get()
+    return [_to_label(row, labels) for row in _predict_batched(texts, tokenizer, predict)]
 
 def finbert_sentiment(text):
     """
-    If config.USE_FINBERT is True, run local FinBERT inference 
+    If config.USE_FINBERT is True, run local FinBERT inference
     for more accurate finance sentiment.
     Returns label: Positive/Negative/Neutral and score.
     """
     if not config.USE_FINBERT:
         # fallback or raise
         return None, None
-    
-    inputs = tokenizer(text, return_tensors="pt", truncation=True, max_length=512)
-    with torch.no_grad():
-        outputs = model(**inputs)
-    logits = outputs.logits
-    probs = torch.softmax(logits, dim=1).tolist()[0]
-    # FinBERT labels: 0=negative, 1=neutral, 2=positive (for the ProsusAI/finbert)
-    label_idx = probs.index(max(probs))
-    if label_idx == 0:
-        label = "Negative"
-    elif label_idx == 1:
-        label = "Neutral"
-    else:
-        label = "Positive"
-    return label, max(probs) 
\ No newline at end of file
+    return finbert_sentiment_batch([text])[0]
+
+def parity_check(texts, backend=None):
+    """
+    Compare a backend (default: config.FINBERT_BACKEND) against the FP32
+    PyTorch reference on `texts`. Reports label agreement, the largest
+    probability difference and the throughput of both.
+    """
+    backend = backend or config.FINBERT_BACKEND
+    tokenizer = _load_tokenizer()
+    labels = _load_labels()
+
+    report = {"backend": backend, "texts": len(texts), "labels": labels}
+    outputs = {}
+    for name in ("torch", backend):
+        predict = _build_predictor(name, tokenizer)
+        started = time.perf_counter()
+        outputs[name] = _predict_batched(texts, tokenizer, predict)
+        report[f"{name}_seconds"] = round(time.perf_counter() - started, 3)
+
+    reference, candidate = outputs["torch"], outputs[backend]
+    agree = sum(_to_label(a, labels)[0] == _to_label(b, labels)[0] for a, b in zip(reference, candidate))
+    report["label_agreement"] = round(agree / len(texts), 4) if texts else 1.0
+    report["max_prob_diff"] = round(max(
+        (abs(x - y) for a, b in zip(reference, candidate) for x, y in zip(a, b)), default=0.0
+    ), 4)
+    if report[f"{backend}_seconds"]:
+        report["speedup"] = round(report["torch_seconds"] / report[f"{backend}_seconds"], 2)
+    return report
+
+if __name__ == "__main__":
+    # python -m app.analysis.finbert_inference [backend] [n_texts]
+    # Parity/throughput check of a backend against FP32 PyTorch on synthetic headlines
+    from .fixtures import SyntheticMarket
+    backend = sys.argv[1] if len(sys.argv) > 1 else config.FINBERT_BACKEND
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    market = SyntheticMarket()
+    texts = []
+    for sym in market.symbols(count):
+        art = market.news(sym, limit=1)[0]
+        texts.append(f"{art['title']}. {art['summary']}")
+    print(parity_check(texts, backend))
@@ -0,0 +1,248 @@
+import datetime
+import itertools
+import random
+import string
+import json
+import math
+import sys
+import os
+import re
+
+# Ensure the parent directory is in the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+import config
+from .jsonutil import json_default, json_object_hook
+
+class FixtureStore:
+    """
+    Records provider responses as JSON files (one per kind/symbol) and replays them.
+    Layout: <directory>/<kind>/<SYMBOL>.json
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, kind, key):
+        safe_key = re.sub(r"[^A-Za-z0-9._-]", "_", str(key))
+        return os.path.join(self.directory, kind, f"{safe_key}.json")
+
+    def save(self, kind, key, value):
+        path = self._path(kind, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(value, f, default=json_default, indent=1)
+        os.replace(tmp_path, path)
+
+    def load(self, kind, key):
+        path = self._path(kind, key)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            value = json.load(f, object_hook=json_object_hook)
+        # quotes are (price, change_pct) tuples; JSON hands them back as lists
+        return tuple(value) if kind == "quote" else value
+
+    def recorder(self, kind, fetch):
+        """
+        Wrap a per-symbol provider function so its non-empty results are saved.
+        """
+        def record(symbol, *args, **kwargs):
+            result = fetch(symbol, *args, **kwargs)
+            if result and (kind != "quote" or result[0] is not None):
+                self.save(kind, symbol, result)
+            return result
+        return record
+
+    def batch_recorder(self, kind, fetch):
+        """
+        Wrap a batch provider ({symbol: value}) so each symbol's value is saved.
+        """
+        def record(symbols, *args, **kwargs):
+            result = fetch(symbols, *args, **kwargs)
+            for symbol, value in (result or {}).items():
+                self.save(kind, symbol, value)
+            return result
+        return record
+
+    def replayer(self, kind):
+        """
+        Provider function that serves recorded results for one symbol.
+        `limit` (for news) is honoured like the live providers do.
+        """
+        def replay(symbol, limit=None):
+            value = self.load(kind, symbol)
+            if value is not None and limit is not None and isinstance(value, list):
+                value = value[:limit]
+            return value
+        return replay
+
+    def batch_replayer(self, kind):
+        def replay(symbols):
+            results = {}
+            for symbol in symbols:
+                value = self.load(kind, symbol)
+                if value is not None:
+                    results[symbol] = value
+            return results
+        return replay
+
+    def history_recorder(self, fetch):
+        """
+        Wrap a history provider ((close, volume) DataFrames) so each symbol's
+        daily bars are merged into its {date: [close, volume]} file.
+        """
+        def record(symbols, start):
+            result = fetch(symbols, start)
+            if result is not None:
+                close, volume = result
+                for symbol in close.columns:
+                    bars = self.load("history", symbol) or {}
+                    for date, price in close[symbol].items():
+                        vol = volume[symbol].get(date) if symbol in volume.columns else None
+                        bars[date.date().isoformat()] = [
+                            None if price != price else float(price),
+                            None if vol is None or vol != vol else float(vol)
+                        ]
+                    self.save("history", symbol, bars)
+            return result
+        return record
+
+    def history_replayer(self):
+        """
+        History provider serving every recorded bar (regardless of `start`, so
+        old recordings still fill the rolling window), or None if none are recorded.
+        """
+        def replay(symbols, start):
+            import pandas as pd
+            closes = {}
+            volumes = {}
+            for symbol in symbols:
+                bars = self.load("history", symbol)
+                if not bars:
+                    continue
+                dates = sorted(bars)
+                index = pd.to_datetime(dates)
+                closes[symbol] = pd.Series([bars[d][0] for d in dates], index=index, dtype=float)
+                volumes[symbol] = pd.Series([bars[d][1] for d in dates], index=index, dtype=float)
+            if not closes:
+                return None
+            return pd.DataFrame(closes), pd.DataFrame(volumes)
+        return replay
+
+# Word pools for synthetic headlines; the sentiment words give VADER/FinBERT something to score
+_POSITIVE = ["beats", "surges", "record", "upgrade", "growth", "strong", "rally", "gains",
+             "outperforms", "raises", "expands", "profit", "bullish", "wins", "boost"]
+_NEGATIVE = ["misses", "plunges", "lawsuit", "downgrade", "weak", "slump", "losses", "cuts",
+             "recall", "probe", "bearish", "warning", "layoffs", "fraud", "decline"]
+_NEUTRAL = ["shares", "quarter", "revenue", "guidance", "analysts", "market", "investors",
+            "earnings", "outlook", "report", "company", "sector", "deal", "CEO", "board",
+            "demand", "supply", "chips", "cloud", "consumer", "trading", "session", "stock",
+            "the", "a", "of", "to", "in", "after", "on", "for", "with", "as", "and"]
+_SOURCES = ["reuters.example", "bloomberg.example", "cnbc.example", "marketwatch.example",
+            "yahoo.example", "seekingalpha.example", "wsj.example"]
+
+class SyntheticMarket:
+    """
+    Seeded generator for quotes and news at any scale.
+    Every value depends only on (seed, symbol), so runs are reproducible
+    regardless of thread scheduling or the order symbols are requested in.
+    Text lengths are log-normally distributed like real headlines/summaries.
+    """
+
+    def __init__(self, seed=42, articles_per_symbol=5, anchor=None):
+        self.seed = seed
+        self.articles_per_symbol = articles_per_symbol
+        # Fixed reference time so publish dates are identical between runs
+        self.anchor = anchor or datetime.datetime(2024, 1, 2, 16, 0)
+
+    def _rng(self, *parts):
+        return random.Random(":".join(str(p) for p in (self.seed,) + parts))
+
+    def symbols(self, count):
+        """
+        `count` distinct ticker-like symbols (AAA, AAB, ..., then 4 letters).
+        """
+        letters = string.ascii_uppercase
+        tickers = (
+            "".join(chars)
+            for length in itertools.count(3)
+            for chars in itertools.product(letters, repeat=length)
+        )
+        return list(itertools.islice(tickers, count))
+
+    def quote(self, symbol):
+        rng = self._rng(symbol, "quote")
+        price = math.exp(rng.gauss(math.log(80), 1.0))
+        change_pct = rng.gauss(0, 1.8)
+        return round(price, 2), round(change_pct, 2)
+
+    def quotes(self, symbols):
+        return {symbol: self.quote(symbol) for symbol in symbols}
+
+    def _words(self, rng, median, sigma, low, high):
+        count = int(round(math.exp(rng.gauss(math.log(median), sigma))))
+        count = max(low, min(high, count))
+        # Each article leans positive, negative or neutral
+        tone = rng.choice([_POSITIVE, _NEGATIVE, _NEUTRAL])
+        words = []
+        for _ in range(count):
+            pool = tone if rng.random() < 0.25 else _NEUTRAL
+            words.append(rng.choice(pool))
+        return words
+
+    def news(self, symbol, limit=5):
+        rng = self._rng(symbol, "news")
+        articles = []
+        hours_ago = 0.0
+        for i in range(min(limit, self.articles_per_symbol)):
+            hours_ago += rng.expovariate(1 / 6)
+            title = f"{symbol} " + " ".join(self._words(rng, 9, 0.35, 3, 25))
+            # ~10% of articles come without a summary, like real feeds
+            summary = "" if rng.random() < 0.1 else " ".join(self._words(rng, 35, 0.6, 5, 200)).capitalize() + "."
+            source = rng.choice(_SOURCES)
+            published = self.anchor - datetime.timedelta(hours=hours_ago)
+            articles.append({
+                "title": title,
+                "summary": summary,
+                "url": f"https://{source}/{symbol.lower()}/{self.seed}-{i}",
+                "av_score": 0.0,
+                "published": published,
+                "provider_publish_time": int(published.timestamp())
+            })
+        return articles
+
+    def history(self, symbols, start):
+        """
+        Daily closes and volumes (two wide DataFrames, dates x symbols) covering
+        as many calendar days as `start` is before today, ending at the anchor.
+        Each symbol's series is a fixed random walk ending at its synthetic quote.
+        """
+        import numpy as np
+        import pandas as pd
+
+        days = max(1, (datetime.date.today() - start).days)
+        all_dates = pd.bdate_range(end=self.anchor.date(), periods=400)
+        dates = all_dates[all_dates >= pd.Timestamp(self.anchor.date() - datetime.timedelta(days=days))]
+
+        closes = {}
+        volumes = {}
+        for symbol in symbols:
+            rng = np.random.default_rng(self._rng(symbol, "history").getrandbits(32))
+            price, _ = self.quote(symbol)
+            daily_vol = rng.uniform(0.008, 0.05)
+            returns = rng.normal(0, daily_vol, len(all_dates))
+            # Walk backwards from the current price so the last close matches the quote
+            path = price * np.exp(-np.cumsum(returns[::-1]))[::-1] * np.exp(returns[-1])
+            base_volume = np.exp(rng.normal(np.log(2e6), 1.0))
+            volume = base_volume * rng.lognormal(0, 0.35, len(all_dates))
+            closes[symbol] = path[-len(dates):]
+            volumes[symbol] = volume[-len(dates):].round()
+        return pd.DataFrame(closes, index=dates), pd.DataFrame(volumes, index=dates)
+
+def fixture_store():
+    return FixtureStore(config.FIXTURE_DIR)
+
+def synthetic_market():
+    return SyntheticMarket(config.SYNTHETIC_SEED, config.SYNTHETIC_ARTICLES_PER_SYMBOL)
+
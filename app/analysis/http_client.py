@@ -0,0 +1,94 @@
+import threading
+import logging
+import random
+import time
+import sys
+import os
+
+# Ensure the parent directory is in the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+import config
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    """
+    Shared, connection-pooled session for all outbound fetches.
+    Connections are kept alive and reused; at most
+    config.HTTP_MAX_CONNECTIONS_PER_HOST are open to any one host
+    (extra requests wait for a free connection instead of opening new ones).
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                # requests is imported here so importing data_fetch stays fast
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=config.HTTP_POOL_HOSTS,
+                    pool_maxsize=config.HTTP_MAX_CONNECTIONS_PER_HOST,
+                    pool_block=True,
+                    max_retries=0  # retries are handled in get() with backoff
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update(DEFAULT_HEADERS)
+                _session = session
+    return _session
+
+def backoff_delay(attempt, retry_after=None):
+    """
+    Exponential backoff with full jitter: a random delay between 0 and
+    base * 2**attempt, capped at config.HTTP_BACKOFF_MAX.
+    A server-provided Retry-After (seconds) is honoured up to the same cap.
+    """
+    if retry_after is not None:
+        return min(retry_after, config.HTTP_BACKOFF_MAX)
+    ceiling = min(config.HTTP_BACKOFF_MAX, config.HTTP_BACKOFF_BASE * (2 ** attempt))
+    return random.uniform(0, ceiling)
+
+def _retry_after(response):
+    value = response.headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+def get(url, retries=None, timeout=None, **kwargs):
+    """
+    GET through the shared session with (connect, read) timeouts and bounded
+    retries on connection errors, timeouts and retryable status codes.
+    Returns the last response, or raises the last exception if every attempt failed.
+    """
+    import requests
+    if retries is None:
+        retries = config.HTTP_RETRIES
+    if timeout is None:
+        timeout = (config.HTTP_CONNECT_TIMEOUT, config.HTTP_READ_TIMEOUT)
+    session = get_session()
+
+    for attempt in range(retries + 1):
+        try:
+            response = session.get(url, timeout=timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt == retries:
+                raise
+            delay = backoff_delay(attempt)
+            logging.warning(f"GET {url} failed ({e}), retrying in {delay:.2f}s")
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                return response
+            delay = backoff_delay(attempt, _retry_after(response))
+            logging.warning(f"GET {url} returned {response.status_code}, retrying in {delay:.2f}s")
+            response.close()
+        time.sleep(delay)
@@ -0,0 +1,17 @@
+import datetime
+
+def json_default(value):
+    """
+    json.dump(default=...) for provider data: datetimes and numpy scalars.
+    Decode with json_object_hook.
+    """
+    if isinstance(value, datetime.datetime):
+        return {"__datetime__": value.isoformat()}
+    if hasattr(value, "item"):  # numpy scalars
+        return value.item()
+    raise TypeError(f"Cannot serialize {type(value)}")
+
+def json_object_hook(obj):
+    if "__datetime__" in obj:
+        return datetime.datetime.fromisoformat(obj["__datetime__"])
+    return obj
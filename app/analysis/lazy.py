@@ -0,0 +1,38 @@
+import threading
+import logging
+import time
+
+# Seconds each lazy resource took to load, by name (for /stats and startup logs)
+load_timings = {}
+
+class Lazy:
+    """
+    Thread-safe lazy initializer.
+    `factory` runs once, on the first get() from any thread; concurrent callers
+    wait for that one load instead of starting their own. If the factory raises,
+    the error propagates and the next get() tries again.
+    """
+
+    def __init__(self, name, factory):
+        self.name = name
+        self._factory = factory
+        self._value = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    def get(self):
+        if self._loaded:
+            return self._value
+        with self._lock:
+            if not self._loaded:
+                started = time.perf_counter()
+                self._value = self._factory()
+                elapsed = time.perf_counter() - started
+                load_timings[self.name] = round(elapsed, 4)
+                logging.info(f"Loaded {self.name} in {elapsed:.3f}s")
+                self._loaded = True
+        return self._value
@@ -1,38 +1,238 @@
+import concurrent.futures
+import threading
 import hashlib
+import logging
+import queue
+import time
 import sys
+import re
 import os
 
 # Ensure the parent directory is in the path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 import config
+from .lazy import Lazy
+from .cache import TTLCache, SingleFlight
+from .disk_cache import DiskCache
+from .rate_limit import TokenBucket
+from . import http_client
+from .chunking import count_tokens, split_chunks, select_chunks
+from . import dedup
 
-# Handle both older and newer versions of OpenAI API
-try:
-    import openai
+MODEL = "gpt-3.5-turbo"
+
+# Bump whenever SUMMARY_PROMPT (or the messages around it) change,
+# so summaries cached for the old prompt are no longer served
+PROMPT_VERSION = 1
+
+SUMMARY_PROMPT = """You are an expert financial analyst. 
+Read the following news article about a company and provide a concise summary in bullet points. 
+Focus on key facts, any stock impact, sentiment, and risks mentioned.
+
+Title: {title}
+Article: {content}
+
+Summary (bullet points):"""
+
+# Long documents are summarized in parts (map) and the parts merged (reduce)
+CHUNK_PROMPT = """You are an expert financial analyst. 
+Summarize this part of a longer financial document in a few bullet points. 
+Keep key facts, figures, any stock impact, sentiment, and risks mentioned.
+
+Part:
+{content}
+
+Summary (bullet points):"""
+
+REDUCE_PROMPT = """You are an expert financial analyst. 
+Below are bullet-point summaries of consecutive parts of one news article or filing. 
+Merge them into one concise summary in bullet points, without repetition. 
+Focus on key facts, any stock impact, sentiment, and risks mentioned.
+
+Title: {title}
+Part summaries:
+{summaries}
+
+Summary (bullet points):"""
+
+def _load_openai():
+    """
+    Import openai and set up the client on first use.
+    Handles both older and newer versions of OpenAI API.
+    Returns (openai module, client or None, openai_new_version).
+    """
+    try:
+        import openai
+    except ImportError:
+        print("Failed to import openai. Please install with: pip install openai")
+        raise
     # Check if this is the new version with Client
     if hasattr(openai, 'OpenAI'):
         # New version
-        client = openai.OpenAI(api_key=config.OPENAI_API_KEY)
-        openai_new_version = True
-    else:
-        # Old version
-        openai.api_key = config.OPENAI_API_KEY
-        openai_new_version = False
-except ImportError:
-    print("Failed to import openai. Please install with: pip install openai")
-    openai_new_version = False
+        return openai, openai.OpenAI(api_key=config.OPENAI_API_KEY), True
+    # Old version
+    openai.api_key = config.OPENAI_API_KEY
+    return openai, None, False
 
-MODEL = "gpt-3.5-turbo"
+_openai = Lazy("openai", _load_openai)
 
-# A simple in-memory cache to store GPT summaries so we don't re-call for the same article
-summary_cache = {}
+def warm_up():
+    """
+    Import openai and build the client now instead of on the first request.
+    """
+    try:
+        _openai.get()
+    except ImportError:
+        pass
+
+def _chat(messages, temperature, max_tokens=None):
+    """
+    One chat completion with whichever OpenAI API version is installed,
+    with at most `max_tokens` completion tokens if given.
+    Returns the stripped message text.
+    """
+    openai, client, openai_new_version = _openai.get()
+    limit = {"max_tokens": max_tokens} if max_tokens else {}
+    if openai_new_version:
+        # New OpenAI API
+        resp = client.chat.completions.create(
+            model=MODEL,
+            messages=messages,
+            temperature=temperature,
+            **limit
+        )
+        return resp.choices[0].message.content.strip()
+    # Old OpenAI API
+    resp = openai.ChatCompletion.create(
+        model=MODEL,
+        messages=messages,
+        temperature=temperature,
+        **limit
+    )
+    return resp["choices"][0]["message"]["content"].strip()
+
+def _chat_stream(messages, temperature):
+    """
+    Streaming chat completion: yields pieces of the message text as they arrive.
+    """
+    openai, client, openai_new_version = _openai.get()
+    if openai_new_version:
+        stream = client.chat.completions.create(
+            model=MODEL,
+            messages=messages,
+            temperature=temperature,
+            stream=True
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+        return
+    stream = openai.ChatCompletion.create(
+        model=MODEL,
+        messages=messages,
+        temperature=temperature,
+        stream=True
+    )
+    for chunk in stream:
+        content = chunk["choices"][0]["delta"].get("content")
+        if content:
+            yield content
+
+# GPT summaries, persisted in SQLite and shared by all workers, so the same
+# article isn't paid for again after a restart or in another worker
+summary_cache = DiskCache(
+    config.SUMMARY_CACHE_PATH,
+    max_bytes=config.SUMMARY_CACHE_MAX_BYTES,
+    ttl=config.SUMMARY_CACHE_TTL
+)
+
+# Answers, keyed by article + normalized question + model; questions repeat
+# mostly during news spikes, so these live in memory for a limited time
+qa_cache = TTLCache(maxsize=config.QA_CACHE_SIZE, ttl=config.QA_CACHE_TTL)
+
+# Identical summaries/answers requested at the same time share one completion
+inflight = SingleFlight()
+
+def cache_stats():
+    """
+    Hit ratio, entries and bytes used by the summary and Q&A caches,
+    and how many requests were coalesced.
+    """
+    return {
+        "summaries": summary_cache.stats(),
+        "answers": qa_cache.stats(),
+        "llm_coalescing": inflight.stats()
+    }
 
 def _hash_text(title, content):
     """
-    Create a short hash key from (title, content).
+    Cache key for (title, content) under the current model and prompt version.
+    """
+    text = f"{MODEL}\0{PROMPT_VERSION}\0{title}\0{content}"
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def _messages(prompt):
+    return [
+        {"role": "system", "content": "You are a helpful financial analysis assistant."},
+        {"role": "user", "content": prompt}
+    ]
+
+def _summary_messages(title, content):
+    return _messages(SUMMARY_PROMPT.format(title=title, content=content))
+
+def _summarize_chunk(chunk, deadline):
+    """
+    Summary of one part of a long document, cached per part so a re-pasted
+    or edited document only re-summarizes the parts that changed.
+    """
+    cache_key = _hash_text("chunk", chunk)
+    cached = summary_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    def fresh():
+        # A call that finished after our cache check may have filled it
+        cached = summary_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        out = _chat_limited(_messages(CHUNK_PROMPT.format(content=chunk)), deadline)
+        if out is None:
+            raise TimeoutError(f"summarizing a long document took over {config.LLM_BULK_DEADLINE}s")
+        summary_cache.set(cache_key, out)
+        return out
+
+    return inflight.do(("chunk", cache_key), fresh)
+
+def _map_chunks(chunks):
+    """
+    Summarize the parts concurrently, paced by the rate-limit buckets.
+    Returns the part summaries in document order.
+    """
+    deadline = time.monotonic() + config.LLM_BULK_DEADLINE
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=max(1, min(config.LLM_MAX_CONCURRENCY, len(chunks))),
+        thread_name_prefix="finsum-llm-map"
+    ) as executor:
+        return list(executor.map(lambda chunk: _summarize_chunk(chunk, deadline), chunks))
+
+def _summary_request(title, content):
+    """
+    Messages for the final summary call. Content longer than
+    config.LLM_CHUNK_TOKENS is split into parts that are summarized in
+    parallel, and the final call merges the part summaries (repeating the
+    map step while the part summaries themselves are still too long).
     """
-    text = f"{title}_{content}"
-    return hashlib.md5(text.encode('utf-8')).hexdigest()
+    if count_tokens(content) <= config.LLM_CHUNK_TOKENS:
+        return _summary_messages(title, content)
+
+    partials = _map_chunks(split_chunks(content, config.LLM_CHUNK_TOKENS))
+    while len(partials) > 1 and count_tokens("\n\n".join(partials)) > config.LLM_CHUNK_TOKENS:
+        merged = _map_chunks(split_chunks("\n\n".join(partials), config.LLM_CHUNK_TOKENS))
+        if len(merged) >= len(partials):
+            break
+        partials = merged
+    summaries = "\n\n".join(f"Part {i}:\n{part}" for i, part in enumerate(partials, 1))
+    return _messages(REDUCE_PROMPT.format(title=title, summaries=summaries))
 
 def summarize_article(title, content):
     """
@@ -42,85 +242,305 @@ def summarize_article(title, content):
         return "(No content to summarize.)"
 
     cache_key = _hash_text(title, content)
-    if cache_key in summary_cache:
-        return summary_cache[cache_key]
-
-    prompt = f"""You are an expert financial analyst. 
-Read the following news article about a company and provide a concise summary in bullet points. 
-Focus on key facts, any stock impact, sentiment, and risks mentioned.
+    cached = summary_cache.get(cache_key)
+    if cached is not None:
+        return cached
 
-Title: {title}
-Article: {content}
-
-Summary (bullet points):"""
+    def fresh():
+        # A call that finished after our cache check may have filled it
+        cached = summary_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        out = _chat(_summary_request(title, content), temperature=0.2)
+        summary_cache.set(cache_key, out)  # store in cache
+        return out
 
-    messages = [
-        {"role": "system", "content": "You are a helpful financial analysis assistant."},
-        {"role": "user", "content": prompt}
-    ]
     try:
-        if openai_new_version:
-            # New OpenAI API
-            resp = client.chat.completions.create(
-                model=MODEL,
-                messages=messages,
-                temperature=0.2
-            )
-            out = resp.choices[0].message.content.strip()
-        else:
-            # Old OpenAI API
-            resp = openai.ChatCompletion.create(
-                model=MODEL,
-                messages=messages,
-                temperature=0.2
-            )
-            out = resp["choices"][0]["message"]["content"].strip()
-        
-        summary_cache[cache_key] = out  # store in cache
-        return out
+        return inflight.do(("summary", cache_key), fresh)
     except Exception as e:
         return f"*(Error summarizing: {e})*"
 
-def answer_question(article_text, question):
+# Client-side limits shared by every bulk summarization in this process
+request_bucket = TokenBucket(config.LLM_REQUESTS_PER_MINUTE)
+token_bucket = TokenBucket(config.LLM_TOKENS_PER_MINUTE)
+
+def _estimate_tokens(messages):
+    """
+    Prompt + expected completion tokens, for the tokens-per-minute bucket.
+    """
+    return sum(count_tokens(message["content"]) for message in messages) + config.LLM_SUMMARY_MAX_TOKENS
+
+def _rate_limit_info(e):
+    """
+    (is_rate_limited, retry_after seconds or None) for an OpenAI exception,
+    for both the old and the new client.
+    """
+    status = getattr(e, "status_code", None) or getattr(e, "http_status", None)
+    limited = status == 429 or type(e).__name__ == "RateLimitError"
+    retry_after = None
+    response = getattr(e, "response", None)
+    headers = getattr(response, "headers", None) or getattr(e, "headers", None) or {}
+    try:
+        value = headers.get("retry-after")
+        retry_after = float(value) if value is not None else None
+    except (TypeError, ValueError, AttributeError):
+        pass
+    return limited, retry_after
+
+def _chat_limited(messages, deadline):
+    """
+    One completion under the request/token buckets, retrying 429s with backoff.
+    The completion is capped at config.LLM_SUMMARY_MAX_TOKENS, which is what
+    _estimate_tokens budgets for. Returns None if the deadline passes first.
+    """
+    tokens = _estimate_tokens(messages)
+    for attempt in range(config.LLM_MAX_RETRIES + 1):
+        if not request_bucket.acquire(1, deadline) or not token_bucket.acquire(tokens, deadline):
+            return None
+        try:
+            return _chat(messages, temperature=0.2, max_tokens=config.LLM_SUMMARY_MAX_TOKENS)
+        except Exception as e:
+            limited, retry_after = _rate_limit_info(e)
+            if not limited or attempt == config.LLM_MAX_RETRIES:
+                raise
+            delay = http_client.backoff_delay(attempt, retry_after)
+            if time.monotonic() + delay > deadline:
+                return None
+            logging.warning(f"OpenAI rate limit hit, retrying in {delay:.2f}s")
+            time.sleep(delay)
+    return None
+
+def summarize_articles(articles, deadline=None, max_workers=None):
+    """
+    Summarize many articles (dicts with title and summary/content) concurrently.
+    - cached summaries are served from summary_cache, and each distinct
+      article (near-duplicates count as one) is requested once
+    - up to config.LLM_MAX_CONCURRENCY requests in flight, paced by the
+      requests-per-minute and tokens-per-minute buckets
+    - 429s are retried with jittered backoff
+    - stops after `deadline` seconds (default config.LLM_BULK_DEADLINE);
+      unfinished articles get None
+    New summaries are written to summary_cache. Returns a list in input order.
+    """
+    if deadline is None:
+        deadline = config.LLM_BULK_DEADLINE
+    if max_workers is None:
+        max_workers = config.LLM_MAX_CONCURRENCY
+    stop_at = time.monotonic() + deadline
+
+    # Near-duplicates (the same story under several tickers) share the
+    # summary of their cluster's first article
+    clusters = dedup.cluster(articles)
+
+    jobs = {}
+    keys = []
+    for cluster in clusters:
+        art = articles[cluster]
+        title = art.get("title", "")
+        content = art.get("content") or art.get("summary") or title
+        key = _hash_text(title, content)
+        keys.append(key)
+        jobs.setdefault(key, (title, content))
+
+    summaries = summary_cache.get_many(list(jobs))
+    missing = [key for key in jobs if key not in summaries]
+    if missing:
+        executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, min(max_workers, len(missing))),
+            thread_name_prefix="finsum-llm"
+        )
+        futures = {
+            executor.submit(_chat_limited, _summary_messages(*jobs[key]), stop_at): key
+            for key in missing
+        }
+        try:
+            for fut in concurrent.futures.as_completed(futures, timeout=max(0, stop_at - time.monotonic())):
+                key = futures[fut]
+                try:
+                    out = fut.result()
+                except Exception as e:
+                    logging.error(f"Error summarizing '{jobs[key][0]}': {e}")
+                    continue
+                if out is not None:
+                    summaries[key] = out
+                    summary_cache.set(key, out)
+        except concurrent.futures.TimeoutError:
+            logging.warning(f"Bulk summarization stopped at the {deadline}s deadline")
+        finally:
+            # Queued requests are dropped; running ones give up at the deadline
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    done = sum(1 for key in jobs if key in summaries)
+    logging.info(f"Summarized {done}/{len(jobs)} distinct articles ({len(jobs) - len(missing)} cached)")
+    return [summaries.get(key) for key in keys]
+
+def stream_summary(title, content):
+    """
+    Like summarize_article, but yields the summary text as it is generated.
+    A cached summary is yielded in one piece; a completed new one is cached.
+    """
+    if not content.strip():
+        yield "(No content to summarize.)"
+        return
+
+    cache_key = _hash_text(title, content)
+    cached = summary_cache.get(cache_key)
+    if cached is not None:
+        yield cached
+        return
+
+    def fresh():
+        # A call that finished after our cache check may have filled it
+        cached = summary_cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+        parts = []
+        try:
+            for piece in _chat_stream(_summary_request(title, content), temperature=0.2):
+                parts.append(piece)
+                yield piece
+        except Exception as e:
+            yield f"*(Error summarizing: {e})*"
+            return
+        summary_cache.set(cache_key, "".join(parts).strip())
+
+    yield from inflight.stream(("summary-stream", cache_key), fresh)
+
+def _question_context(article_text, question):
     """
-    Q&A with GPT. No caching here since Q's can vary widely.
+    The article, or for long articles only the passages most relevant to the
+    question (up to config.LLM_QA_CONTEXT_TOKENS), in document order.
     """
+    if count_tokens(article_text) <= config.LLM_QA_CONTEXT_TOKENS:
+        return article_text
+    chunks = split_chunks(article_text, config.LLM_QA_CHUNK_TOKENS)
+    return "\n\n[...]\n\n".join(select_chunks(question, chunks, config.LLM_QA_CONTEXT_TOKENS))
+
+def _question_messages(article_text, question):
     system_msg = (
         "You are a financial analyst assistant. You have been provided with an article's content. "
         "Answer the user's question based ONLY on the information in the article. "
         "If the answer is not in the article, say you do not know. "
         "Think step-by-step and provide a clear, concise answer."
     )
-    messages = [
+    return [
         {"role": "system", "content": system_msg},
-        {"role": "assistant", "content": f"Article:\n{article_text}"},
+        {"role": "assistant", "content": f"Article:\n{_question_context(article_text, question)}"},
         {"role": "user", "content": question}
     ]
+
+def normalize_question(question):
+    """
+    Case, whitespace and trailing punctuation don't change the question.
+    """
+    return re.sub(r"\s+", " ", question).strip().rstrip("?!. ").lower()
+
+def _qa_key(article_text, question):
+    article_hash = hashlib.sha256(article_text.encode('utf-8')).hexdigest()
+    return (MODEL, PROMPT_VERSION, article_hash, normalize_question(question))
+
+def answer_question(article_text, question):
+    """
+    Q&A with GPT. Answers are cached per article and normalized question.
+    """
+    key = _qa_key(article_text, question)
+    cached = qa_cache.get(key)
+    if cached is not None:
+        return cached
+
+    def fresh():
+        # A call that finished after our cache check may have filled it
+        cached = qa_cache.get(key)
+        if cached is not None:
+            return cached
+        out = _chat(_question_messages(article_text, question), temperature=0)
+        qa_cache.set(key, out)
+        return out
+
     try:
-        if openai_new_version:
-            # New OpenAI API
-            resp = client.chat.completions.create(
-                model=MODEL,
-                messages=messages,
-                temperature=0
-            )
-            ans = resp.choices[0].message.content.strip()
-        else:
-            # Old OpenAI API
-            resp = openai.ChatCompletion.create(
-                model=MODEL,
-                messages=messages,
-                temperature=0
-            )
-            ans = resp["choices"][0]["message"]["content"].strip()
-        
-        return ans
+        return inflight.do(("answer",) + key, fresh)
     except Exception as e:
         return f"*(Error in Q&A: {e})*"
 
+def stream_answer(article_text, question):
+    """
+    Like answer_question, but yields the answer text as it is generated.
+    """
+    key = _qa_key(article_text, question)
+    cached = qa_cache.get(key)
+    if cached is not None:
+        yield cached
+        return
+
+    def fresh():
+        # A call that finished after our cache check may have filled it
+        cached = qa_cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+        parts = []
+        try:
+            for piece in _chat_stream(_question_messages(article_text, question), temperature=0):
+                parts.append(piece)
+                yield piece
+        except Exception as e:
+            yield f"*(Error in Q&A: {e})*"
+            return
+        qa_cache.set(key, "".join(parts).strip())
+
+    yield from inflight.stream(("answer-stream",) + key, fresh)
+
 def analyze_text(article_text):
     """
     For a pasted article, we generate a summary immediately.
     """
     summ = summarize_article("User provided text", article_text)
-    return {"summary": summ} 
\ No newline at end of file
+    return {"summary": summ}
+
+def analyze_article(article_text, question=None):
+    """
+    Summary (and answer, if a question was asked) for a pasted article,
+    with both completions requested at the same time.
+    """
+    if not question:
+        return analyze_text(article_text)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        summary = executor.submit(analyze_text, article_text)
+        answer = executor.submit(answer_question, article_text, question)
+        result = summary.result()
+        result["answer"] = answer.result()
+    result["question"] = question
+    return result
+
+def stream_article(article_text, question=None):
+    """
+    Stream the summary and (optionally) the answer for a pasted article.
+    Both completions run concurrently; yields ("summary" | "answer", text)
+    pieces in arrival order, interleaved.
+    """
+    streams = {"summary": stream_summary("User provided text", article_text)}
+    if question:
+        streams["answer"] = stream_answer(article_text, question)
+
+    pieces = queue.Queue()
+
+    def pump(kind, stream):
+        try:
+            for piece in stream:
+                pieces.put((kind, piece))
+        except Exception as e:
+            logging.error(f"Error streaming {kind}: {e}")
+        finally:
+            pieces.put((kind, None))
+
+    for kind, stream in streams.items():
+        threading.Thread(target=pump, args=(kind, stream), name=f"finsum-llm-{kind}", daemon=True).start()
+
+    remaining = len(streams)
+    while remaining:
+        kind, piece = pieces.get()
+        if piece is None:
+            remaining -= 1
+        else:
+            yield kind, piece
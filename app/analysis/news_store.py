@@ -0,0 +1,159 @@
+import sqlite3
+import threading
+import datetime
+import logging
+import time
+import sys
+import os
+from contextlib import closing
+
+# Ensure the parent directory is in the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+import config
+
+# Articles are keyed by (symbol, url) so the same story is stored once per ticker;
+# the key alone dedups re-fetched articles. `source_watermarks` holds the newest
+# provider publish time seen per (symbol, source), so articles that carry a real
+# publish time and are older than that can be skipped without a write. Articles
+# without one (e.g. Google, whose dates are made up) never move or meet it.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    symbol TEXT NOT NULL,
+    url TEXT NOT NULL,
+    title TEXT,
+    summary TEXT,
+    source TEXT,
+    av_score REAL DEFAULT 0,
+    published REAL NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (symbol, url)
+);
+CREATE INDEX IF NOT EXISTS idx_articles_symbol_published
+    ON articles (symbol, published DESC);
+CREATE TABLE IF NOT EXISTS source_watermarks (
+    symbol TEXT NOT NULL,
+    source TEXT NOT NULL,
+    last_published REAL NOT NULL,
+    PRIMARY KEY (symbol, source)
+);
+DROP TABLE IF EXISTS watermarks;
+"""
+
+_init_lock = threading.Lock()
+_initialized = False
+
+def _connect():
+    """
+    Open a connection to the news store, creating the schema on first use.
+    One short-lived connection per call keeps this safe to use from worker threads.
+    """
+    global _initialized
+    path = config.NEWS_STORE_PATH
+    if not _initialized:
+        with _init_lock:
+            if not _initialized:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                with closing(sqlite3.connect(path, timeout=10)) as conn:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(SCHEMA)
+                    conn.commit()
+                _initialized = True
+    conn = sqlite3.connect(path, timeout=10)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def _timestamp(published):
+    if isinstance(published, datetime.datetime):
+        return published.timestamp()
+    if published:
+        return float(published)
+    return time.time()
+
+def get_watermark(symbol, source=None):
+    """
+    Newest provider publish time (epoch seconds) stored for `symbol` from
+    `source`, or 0.
+    """
+    with closing(_connect()) as conn:
+        row = conn.execute(
+            "SELECT last_published FROM source_watermarks WHERE symbol = ? AND source = ?",
+            (symbol, source or "")
+        ).fetchone()
+    return row["last_published"] if row else 0.0
+
+def store_articles(symbol, articles, source=None):
+    """
+    Insert new articles; URLs already stored for the symbol are ignored.
+    Articles with a real provider publish time older than the (symbol, source)
+    watermark are skipped. Returns the number of new articles stored.
+    """
+    try:
+        watermark = get_watermark(symbol, source)
+        now = time.time()
+        rows = []
+        newest = watermark
+        for art in articles:
+            url = art.get("url")
+            if not url:
+                continue
+            provider_time = art.get("provider_publish_time")
+            published = _timestamp(provider_time or art.get("published"))
+            if provider_time:
+                if published < watermark:
+                    continue
+                newest = max(newest, published)
+            rows.append((
+                symbol, url, art.get("title", ""), art.get("summary", ""),
+                source, art.get("av_score", 0.0), published, now
+            ))
+
+        if not rows:
+            return 0
+
+        with closing(_connect()) as conn:
+            with conn:
+                cur = conn.executemany(
+                    "INSERT OR IGNORE INTO articles "
+                    "(symbol, url, title, summary, source, av_score, published, fetched_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                inserted = cur.rowcount
+                if newest > watermark:
+                    conn.execute(
+                        "INSERT INTO source_watermarks (symbol, source, last_published) VALUES (?, ?, ?) "
+                        "ON CONFLICT(symbol, source) DO UPDATE SET last_published = "
+                        "MAX(last_published, excluded.last_published)",
+                        (symbol, source or "", newest)
+                    )
+        logging.info(f"Stored {inserted} new articles for {symbol}")
+        return inserted
+    except sqlite3.Error as e:
+        logging.error(f"Error storing news for {symbol}: {e}")
+        print(f"Error storing news for {symbol}: {e}")
+        return 0
+
+def recent_articles(symbol, limit=5):
+    """
+    Newest stored articles for `symbol`, in the same shape data_fetch returns.
+    """
+    try:
+        with closing(_connect()) as conn:
+            rows = conn.execute(
+                "SELECT url, title, summary, source, av_score, published FROM articles "
+                "WHERE symbol = ? ORDER BY published DESC LIMIT ?",
+                (symbol, limit)
+            ).fetchall()
+    except sqlite3.Error as e:
+        logging.error(f"Error reading stored news for {symbol}: {e}")
+        print(f"Error reading stored news for {symbol}: {e}")
+        return []
+
+    return [{
+        "title": row["title"],
+        "summary": row["summary"],
+        "url": row["url"],
+        "source": row["source"],
+        "av_score": row["av_score"],
+        "published": datetime.datetime.fromtimestamp(row["published"])
+    } for row in rows]
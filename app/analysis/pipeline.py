@@ -0,0 +1,235 @@
+import threading
+import logging
+import queue
+import time
+import sys
+import os
+
+# Ensure the parent directory is in the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+import config
+from . import data_fetch, sentiment, risk
+from .dedup import NearDuplicateIndex
+
+# End-of-stream marker passed between stages
+_DONE = object()
+
+def article_text(article):
+    """
+    Text that is scored for one article.
+    """
+    return f"{article['title']}. {article.get('summary') or ''}"
+
+def sentiment_trend(avg_sentiment):
+    if avg_sentiment > 0.05:
+        return "Bullish"
+    elif avg_sentiment < -0.05:
+        return "Bearish"
+    return "Neutral"
+
+def aggregate_sentiment(info):
+    """
+    Average the scored articles of one symbol and label the trend.
+    """
+    scores = [article["local_compound"] for article in info["news"]]
+    avg = sum(scores) / len(scores) if scores else 0
+    info["avg_sentiment"] = avg
+    info["sentiment_trend"] = sentiment_trend(avg)
+
+def score_symbols(items, index=None, cluster_scores=None):
+    """
+    Score the articles of several (symbol, info) pairs in one sentiment batch.
+    With a NearDuplicateIndex, near-duplicate articles (also across earlier
+    calls sharing the same index and cluster_scores) are scored once per
+    cluster and the score copied to every member.
+    """
+    articles = [article for _, info in items for article in info["news"]]
+    texts = [article_text(article) for article in articles]
+    if index is None:
+        scored = sentiment.analyze_sentiment_batch(texts)
+    else:
+        if cluster_scores is None:
+            cluster_scores = {}
+        clusters = [index.add(article["title"], article.get("summary")) for article in articles]
+        # The first member of a new cluster is scored for the whole cluster
+        todo = {}
+        for cluster, text in zip(clusters, texts):
+            if cluster not in cluster_scores:
+                todo.setdefault(cluster, text)
+        cluster_scores.update(zip(todo, sentiment.analyze_sentiment_batch(list(todo.values()))))
+        scored = [cluster_scores[cluster] for cluster in clusters]
+        for article, cluster in zip(articles, clusters):
+            article["cluster"] = cluster
+    for article, (comp, lbl, _) in zip(articles, scored):
+        article["local_sentiment"] = lbl
+        article["local_compound"] = comp
+
+class _StageTimer:
+    """
+    Wall time (first start to last finish) and busy time for one stage.
+    """
+
+    def __init__(self):
+        self.first_start = None
+        self.last_end = None
+        self.busy = 0.0
+        self.items = 0
+
+    def start(self):
+        now = time.perf_counter()
+        if self.first_start is None:
+            self.first_start = now
+        return now
+
+    def stop(self, started, items=1):
+        self.last_end = time.perf_counter()
+        self.busy += self.last_end - started
+        self.items += items
+
+    def report(self):
+        wall = 0.0
+        if self.first_start is not None and self.last_end is not None:
+            wall = self.last_end - self.first_start
+        return {"wall": round(wall, 4), "busy": round(self.busy, 4), "items": self.items}
+
+class AnalysisPipeline:
+    """
+    fetch -> score -> aggregate -> risk for a list of symbols.
+    - fetch: quotes in one batch, news per symbol in parallel (data_fetch.iter_stocks);
+      price history is downloaded alongside
+    - score: runs in its own thread and scores whatever symbols have arrived
+      in one sentiment batch (up to config.PIPELINE_SCORE_BATCH_SYMBOLS), so
+      scoring overlaps with fetching the remaining symbols; near-duplicate
+      articles across the run are scored once per cluster
+    - aggregate: average sentiment and trend per symbol as soon as it's scored
+    - risk: one vectorized pass over all symbols (risk.assess_portfolio)
+    Timings of the most recent run for each label are kept for /stats.
+    """
+
+    def __init__(self, max_workers=None, score_batch_symbols=None):
+        self.max_workers = max_workers
+        self.score_batch_symbols = score_batch_symbols or config.PIPELINE_SCORE_BATCH_SYMBOLS
+        self.last_runs = {}
+
+    def _fetch_stage(self, symbols, outbox, timer, errors):
+        try:
+            started = timer.start()
+            for sym, info in data_fetch.iter_stocks(symbols, self.max_workers):
+                timer.stop(started)
+                outbox.put((sym, info))
+                started = time.perf_counter()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            outbox.put(_DONE)
+
+    def _history_stage(self, symbols, result, timer, errors):
+        try:
+            started = timer.start()
+            result.update(data_fetch.get_history_features(symbols))
+            timer.stop(started, len(result))
+        except Exception as e:
+            errors.append(e)
+
+    def _score_stage(self, inbox, outbox, timer, errors, dedup_stats):
+        done = False
+        # Near-duplicates are detected across the whole run, not just one batch
+        index = NearDuplicateIndex() if config.DEDUP_ENABLED else None
+        cluster_scores = {}
+        try:
+            while not done:
+                batch = []
+                item = inbox.get()
+                # Take whatever else has already arrived, up to the batch limit
+                while True:
+                    if item is _DONE:
+                        done = True
+                        break
+                    batch.append(item)
+                    if len(batch) >= self.score_batch_symbols:
+                        break
+                    try:
+                        item = inbox.get_nowait()
+                    except queue.Empty:
+                        break
+                if batch:
+                    started = timer.start()
+                    score_symbols(batch, index, cluster_scores)
+                    timer.stop(started, len(batch))
+                    for entry in batch:
+                        outbox.put(entry)
+            if index is not None:
+                dedup_stats.update(articles=len(index), clusters=index.cluster_count())
+        except Exception as e:
+            errors.append(e)
+        finally:
+            outbox.put(_DONE)
+
+    def run(self, symbols, label="default"):
+        """
+        Analyze `symbols` and return {symbol: info} in input order, with
+        scored articles, avg_sentiment, sentiment_trend and risk_level.
+        """
+        run_started = time.perf_counter()
+        unique_symbols = list(dict.fromkeys(symbols))
+        timers = {stage: _StageTimer() for stage in ("fetch", "history", "score", "aggregate", "risk")}
+        errors = []
+        fetched = queue.Queue()
+        scored = queue.Queue()
+        history = {}
+        dedup_stats = {}
+
+        threads = [
+            threading.Thread(target=self._fetch_stage, args=(unique_symbols, fetched, timers["fetch"], errors),
+                             name="finsum-pipeline-fetch", daemon=True),
+            threading.Thread(target=self._score_stage, args=(fetched, scored, timers["score"], errors, dedup_stats),
+                             name="finsum-pipeline-score", daemon=True)
+        ]
+        if config.HISTORY_ENABLED:
+            threads.append(threading.Thread(
+                target=self._history_stage, args=(unique_symbols, history, timers["history"], errors),
+                name="finsum-pipeline-history", daemon=True
+            ))
+        for thread in threads:
+            thread.start()
+
+        results = {}
+        while True:
+            item = scored.get()
+            if item is _DONE:
+                break
+            sym, info = item
+            started = timers["aggregate"].start()
+            aggregate_sentiment(info)
+            results[sym] = info
+            timers["aggregate"].stop(started)
+
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+
+        for sym, values in history.items():
+            if sym in results:
+                results[sym].update(values)
+
+        started = timers["risk"].start()
+        for sym, level in risk.assess_portfolio(results).items():
+            results[sym]["risk_level"] = level
+        timers["risk"].stop(started, len(results))
+
+        timings = {stage: timer.report() for stage, timer in timers.items()}
+        timings["total"] = round(time.perf_counter() - run_started, 4)
+        self.last_runs[label] = {
+            "symbols": len(unique_symbols),
+            "finished": time.time(),
+            "stages": timings,
+            "dedup": dedup_stats
+        }
+        logging.info(f"Pipeline run '{label}' for {len(unique_symbols)} symbols: {timings}")
+
+        # Preserve input order
+        return {sym: results[sym] for sym in unique_symbols if sym in results}
+
+    def stats(self):
+        return dict(self.last_runs)
@@ -0,0 +1,214 @@
+import threading
+import logging
+import time
+from concurrent.futures import wait, FIRST_COMPLETED
+import sys
+import os
+
+# Ensure the parent directory is in the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+import config
+
+class CircuitBreaker:
+    """
+    Per-provider circuit breaker.
+    - closed: calls go through; `failure_threshold` consecutive failures open it
+    - open: calls are skipped until `reset_timeout` seconds have passed
+    - half_open: a single probe call is let through; success closes the
+      breaker again, failure re-opens it for another `reset_timeout`
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=3, reset_timeout=60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            # half-open: only one probe at a time
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logging.warning(f"Circuit opened after {self.consecutive_failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+class Provider:
+    """
+    A named data source function plus its breaker and call counters.
+    """
+
+    def __init__(self, name, fetch, breaker, is_empty):
+        self.name = name
+        self.fetch = fetch
+        self.breaker = breaker
+        self.is_empty = is_empty
+        self.calls = 0
+        self.successes = 0
+        self.errors = 0
+        self.empty = 0
+        self.skipped = 0
+        self.total_latency = 0.0
+
+    def health(self):
+        failures = self.errors + self.empty
+        return {
+            "state": self.breaker.state,
+            "consecutive_failures": self.breaker.consecutive_failures,
+            "calls": self.calls,
+            "successes": self.successes,
+            "errors": self.errors,
+            "empty": self.empty,
+            "skipped": self.skipped,
+            "error_rate": round(failures / self.calls, 3) if self.calls else 0.0,
+            "avg_latency": round(self.total_latency / self.calls, 3) if self.calls else 0.0
+        }
+
+class ProviderRegistry:
+    """
+    Ordered fallback chain of providers, each behind its own circuit breaker.
+    Errors and empty responses count as failures; while a provider's breaker
+    is open it is skipped and the next provider is tried straight away.
+    """
+
+    def __init__(self, kind):
+        self.kind = kind
+        self._providers = []
+        self._lock = threading.Lock()
+
+    def register(self, name, fetch, is_empty=None, failure_threshold=None, reset_timeout=None):
+        breaker = CircuitBreaker(
+            failure_threshold or config.PROVIDER_FAILURE_THRESHOLD,
+            reset_timeout or config.PROVIDER_RESET_TIMEOUT
+        )
+        provider = Provider(name, fetch, breaker, is_empty or (lambda result: not result))
+        self._providers.append(provider)
+        return provider
+
+    def providers(self):
+        return list(self._providers)
+
+    def call(self, provider, *args, **kwargs):
+        """
+        Call a single provider through its breaker.
+        Returns its result, or None if it was skipped, failed or came back empty.
+        """
+        if not provider.breaker.allow():
+            with self._lock:
+                provider.skipped += 1
+            return None
+
+        started = time.monotonic()
+        try:
+            result = provider.fetch(*args, **kwargs)
+        except Exception as e:
+            logging.error(f"{self.kind} provider {provider.name} failed: {e}")
+            result = None
+            failed = "errors"
+        else:
+            failed = "empty" if provider.is_empty(result) else None
+
+        with self._lock:
+            provider.calls += 1
+            provider.total_latency += time.monotonic() - started
+            if failed:
+                setattr(provider, failed, getattr(provider, failed) + 1)
+            else:
+                provider.successes += 1
+
+        if failed:
+            provider.breaker.record_failure()
+            return None
+        provider.breaker.record_success()
+        return result
+
+    def fetch(self, *args, **kwargs):
+        """
+        Try each provider in order. Returns (provider_name, result) for the first
+        non-empty result, or (None, None) if every provider failed or was skipped.
+        """
+        for provider in self._providers:
+            result = self.call(provider, *args, **kwargs)
+            if result is not None:
+                return provider.name, result
+        return None, None
+
+    def fetch_hedged(self, executor, *args, hedge_delay=1.0, deadline=None, **kwargs):
+        """
+        Hedged version of fetch(): start the first provider on `executor`; if it
+        hasn't produced a non-empty result after `hedge_delay` seconds (or has
+        already failed), start the next one as well. The first non-empty result
+        wins and slower calls are ignored. Gives up after `deadline` seconds.
+        Returns (provider_name, result) or (None, None).
+        """
+        started = time.monotonic()
+        end = started + deadline if deadline else None
+        waiting = list(self._providers)
+        running = {}
+
+        def launch():
+            provider = waiting.pop(0)
+            running[executor.submit(self.call, provider, *args, **kwargs)] = provider
+
+        if waiting:
+            launch()
+        next_hedge = time.monotonic() + hedge_delay
+
+        while running:
+            now = time.monotonic()
+            timeouts = []
+            if waiting:
+                timeouts.append(next_hedge - now)
+            if end is not None:
+                timeouts.append(end - now)
+            timeout = max(0.0, min(timeouts)) if timeouts else None
+
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            for fut in done:
+                provider = running.pop(fut)
+                result = fut.result()
+                if result is not None:
+                    return provider.name, result
+
+            now = time.monotonic()
+            if end is not None and now >= end:
+                logging.warning(f"{self.kind} providers missed the {deadline}s deadline for {args}")
+                break
+            # Hedge: the delay has passed, or everything in flight has already failed
+            if waiting and (now >= next_hedge or not running):
+                launch()
+                next_hedge = now + hedge_delay
+
+        return None, None
+
+    def health(self):
+        return {provider.name: provider.health() for provider in self._providers}
@@ -0,0 +1,49 @@
+import threading
+import time
+
+class TokenBucket:
+    """
+    Client-side rate limiter: `rate_per_minute` units refill continuously,
+    up to `capacity` (default: one minute's worth).
+    acquire() blocks until enough units are available, so callers in many
+    threads are spread out instead of bursting into the provider's limit.
+    """
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, amount=1):
+        """
+        Take `amount` units if available right now. Returns 0 on success,
+        otherwise the seconds until they will be.
+        """
+        # A single request larger than the bucket can never fit; let it through when full
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return 0.0
+            return (amount - self._tokens) / self.rate
+
+    def acquire(self, amount=1, deadline=None):
+        """
+        Block until `amount` units are taken. Returns False (taking nothing)
+        if that can't happen before `deadline` (a time.monotonic() value).
+        """
+        while True:
+            wait_for = self.try_acquire(amount)
+            if wait_for == 0:
+                return True
+            if deadline is not None and time.monotonic() + wait_for > deadline:
+                return False
+            time.sleep(wait_for)
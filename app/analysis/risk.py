@@ -0,0 +1,86 @@
+import operator
+import sys
+import os
+
+# Ensure the parent directory is in the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+import config
+
+OPERATORS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq
+}
+
+def _negative_articles(info):
+    return [art.get("local_sentiment") for art in info.get("news", [])].count("Negative")
+
+# Columns that are derived rather than read straight from the stock info
+DERIVED = {"negative_articles": _negative_articles}
+
+def risk_columns(stocks, features=None):
+    """
+    Columnar view of {symbol: stock_info}: (symbols, {feature: float array}).
+    Missing or None values become NaN, which never satisfies a rule.
+    """
+    import numpy as np
+    if features is None:
+        features = {rule["feature"] for rule in config.RISK_RULES}
+    symbols = list(stocks)
+    infos = [stocks[sym] for sym in symbols]
+
+    columns = {}
+    for feature in features:
+        getter = DERIVED.get(feature)
+        if getter:
+            values = [getter(info) for info in infos]
+        else:
+            values = [info.get(feature) for info in infos]
+        # dtype=float turns None into NaN
+        columns[feature] = np.array(values, dtype=float)
+    return symbols, columns
+
+def risk_points(columns, rules=None):
+    """
+    Total risk points per row for config.RISK_RULES (or `rules`).
+    """
+    import numpy as np
+    rules = config.RISK_RULES if rules is None else rules
+    size = len(next(iter(columns.values()))) if columns else 0
+    points = np.zeros(size)
+    for rule in rules:
+        values = columns[rule["feature"]]
+        if "per_unit" in rule:
+            points += np.nan_to_num(values) * rule["per_unit"]
+        else:
+            op = OPERATORS.get(rule["op"])
+            if op is None:
+                raise ValueError(f"Unknown risk rule operator {rule['op']!r}")
+            with np.errstate(invalid="ignore"):
+                hit = op(values, rule["threshold"])
+            points += np.where(hit, rule["points"], 0)
+    return points
+
+def risk_levels(points, levels=None):
+    """
+    Label for each point total: the first (minimum, label) in
+    config.RISK_LEVELS whose minimum is reached, else the last label.
+    """
+    import numpy as np
+    levels = config.RISK_LEVELS if levels is None else levels
+    conditions = [points >= minimum for minimum, _ in levels]
+    return np.select(conditions, [label for _, label in levels], default=levels[-1][1])
+
+def assess_portfolio(stocks):
+    """
+    Risk level for every symbol in {symbol: stock_info}, scored in one pass.
+    Each stock_info needs its articles' local_sentiment and avg_sentiment.
+    Returns {symbol: "High"/"Medium"/"Low"}.
+    """
+    if not stocks:
+        return {}
+    symbols, columns = risk_columns(stocks)
+    labels = risk_levels(risk_points(columns))
+    return dict(zip(symbols, labels.tolist()))
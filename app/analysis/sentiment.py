@@ -1,87 +1,164 @@
 import re
-import nltk
-from nltk.sentiment import SentimentIntensityAnalyzer
+import hashlib
 import sys
 import os
 
 # Ensure the parent directory is in the path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 import config
+from .cache import TTLCache
+from .disk_cache import DiskCache
+from .lazy import Lazy
+# Cheap to import: the FinBERT model itself is only loaded on first use
+from . import finbert_inference
+from . import risk
 
-try:
-    _ = SentimentIntensityAnalyzer()
-except:
-    nltk.download('vader_lexicon')
+def _load_vader():
+    """
+    Import NLTK and build the VADER analyzer, downloading the lexicon if missing.
+    Returns (analyzer, nltk version).
+    """
+    import nltk
+    from nltk.sentiment import SentimentIntensityAnalyzer
+    try:
+        analyzer = SentimentIntensityAnalyzer()
+    except LookupError:
+        nltk.download('vader_lexicon')
+        analyzer = SentimentIntensityAnalyzer()
+    return analyzer, nltk.__version__
 
-sia = SentimentIntensityAnalyzer()
+_vader = Lazy("vader", _load_vader)
 
-# If we have finbert
-if config.USE_FINBERT:
-    from .finbert_inference import finbert_sentiment
+def warm_up():
+    """
+    Load the sentiment backend now instead of on the first scored article.
+    """
+    if config.USE_FINBERT:
+        finbert_inference.warm_up()
+    else:
+        _vader.get()
+
+# Recent scores, keyed by (backend, model version, hash of the cleaned text),
+# so unchanged headlines aren't re-scored on every refresh or for every user
+score_memo = TTLCache(maxsize=config.SENTIMENT_MEMO_SIZE)
+
+# Same keys on disk, shared across restarts and gunicorn workers
+score_store = DiskCache(
+    config.SENTIMENT_DISK_CACHE_PATH,
+    max_entries=config.SENTIMENT_DISK_CACHE_SIZE
+) if config.SENTIMENT_DISK_CACHE_ENABLED else None
+
+def cache_stats():
+    """
+    Counters for the in-memory and on-disk score caches.
+    """
+    stats = {"memory": score_memo.stats()}
+    if score_store is not None:
+        stats["disk"] = score_store.stats()
+    return stats
 
 def clean_text(txt):
     return re.sub(r"\s+", " ", txt).strip()
 
-def analyze_sentiment(text):
+def _backend():
     """
-    If config.USE_FINBERT => use finbert_inference, else use VADER.
-    Returns (compound, label, raw_dict or confidence).
+    (backend, model version) used for scoring right now.
     """
-    ctext = clean_text(text)
-
     if config.USE_FINBERT:
-        label, prob = finbert_sentiment(ctext)
-        # We'll simulate compound from prob for consistency
-        if label == "Positive":
-            compound = prob  # e.g. 0.8 => strong positivity
-        elif label == "Negative":
-            compound = -prob
-        else:
-            compound = 0.0
-        return compound, label, {"confidence": prob}
+        return "finbert", finbert_inference.model_version()
+    return "vader", _vader.get()[1]
+
+def _finbert_result(label, prob):
+    # We'll simulate compound from prob for consistency
+    if label == "Positive":
+        compound = prob  # e.g. 0.8 => strong positivity
+    elif label == "Negative":
+        compound = -prob
     else:
-        scores = sia.polarity_scores(ctext)
-        compound = scores["compound"]
-        if compound >= 0.05:
-            label = "Positive"
-        elif compound <= -0.05:
-            label = "Negative"
-        else:
-            label = "Neutral"
-        return compound, label, scores
+        compound = 0.0
+    return compound, label, {"confidence": prob}
 
-def evaluate_risk(symbol, stock_info):
+def _vader_result(ctext):
+    scores = _vader.get()[0].polarity_scores(ctext)
+    compound = scores["compound"]
+    if compound >= 0.05:
+        label = "Positive"
+    elif compound <= -0.05:
+        label = "Negative"
+    else:
+        label = "Neutral"
+    return compound, label, scores
+
+def _score_batch(ctexts):
     """
-    Enhanced heuristic risk:
-    - negative articles
-    - large price drop
-    - average sentiment
-    - optional: high volume or implied volatility (not shown here)
+    Score cleaned texts with FinBERT (one batched inference) or VADER.
     """
-    risk_points = 0
+    if config.USE_FINBERT:
+        return [
+            _finbert_result(label, prob)
+            for label, prob in finbert_inference.finbert_sentiment_batch(ctexts)
+        ]
+    return [_vader_result(ctext) for ctext in ctexts]
 
-    # negative articles
-    neg_count = 0
-    for art in stock_info["news"]:
-        if art.get("local_sentiment") == "Negative":
-            neg_count += 1
-    risk_points += neg_count * 20
+def analyze_sentiment_batch(texts):
+    """
+    Score many texts in one call.
+    Identical cleaned texts are scored once per batch, and texts scored before
+    are served from score_memo, then from the on-disk score_store.
+    Returns a list of (compound, label, raw_dict or confidence) in input order.
+    """
+    backend, version = _backend()
+    cleaned = [clean_text(text or "") for text in texts]
 
-    # Price drop more than 2%
-    chg = stock_info.get("change_pct", 0)
-    if chg < -2:
-        risk_points += 40
+    results = {}
+    misses = {}
+    for ctext in dict.fromkeys(cleaned):
+        key = (backend, version, hashlib.sha1(ctext.encode("utf-8")).hexdigest())
+        result = score_memo.get(key)
+        if result is None:
+            misses[ctext] = key
+        else:
+            results[ctext] = result
 
-    # average sentiment below -0.2 => add 30
-    avg_s = stock_info.get("avg_sentiment", 0)
-    if avg_s < -0.2:
-        risk_points += 30
+    # Scores another worker (or an earlier run) already computed
+    if misses and score_store is not None:
+        stored = score_store.get_many("|".join(key) for key in misses.values())
+        for ctext, key in list(misses.items()):
+            value = stored.get("|".join(key))
+            if value is not None:
+                result = tuple(value)
+                score_memo.set(key, result)
+                results[ctext] = result
+                del misses[ctext]
 
-    # Example extension: if volume or volatility is high, risk_points += 20
+    # Everything not cached is scored together
+    if misses:
+        scored = dict(zip(misses, _score_batch(list(misses))))
+        for ctext, result in scored.items():
+            score_memo.set(misses[ctext], result)
+            results[ctext] = result
+        if score_store is not None:
+            score_store.set_many({
+                "|".join(misses[ctext]): list(result) for ctext, result in scored.items()
+            })
 
-    if risk_points >= 70:
-        return "High"
-    elif risk_points >= 30:
-        return "Medium"
-    else:
-        return "Low" 
\ No newline at end of file
+    return [results[ctext] for ctext in cleaned]
+
+def analyze_sentiment(text):
+    """
+    If config.USE_FINBERT => use finbert_inference, else use VADER.
+    Returns (compound, label, raw_dict or confidence).
+    """
+    return analyze_sentiment_batch([text])[0]
+
+def evaluate_risk(symbol, stock_info):
+    """
+    Risk level for one symbol, using the configured rules in risk.py:
+    - negative articles
+    - large price drop
+    - average sentiment
+    - realized volatility, drawdown and volume spikes from daily history
+      (only when data_fetch could get price history)
+    For many symbols use risk.assess_portfolio, which scores them in one pass.
+    """
+    return risk.assess_portfolio({symbol: stock_info})[symbol]
@@ -0,0 +1,118 @@
+import threading
+import queue
+import json
+import time
+
+# Fields pushed to the dashboard when they change
+SYMBOL_FIELDS = ["price", "change_pct", "avg_sentiment", "sentiment_trend", "risk_level"]
+
+def format_sse(event, data):
+    """
+    Encode one server-sent event.
+    """
+    payload = json.dumps(data, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+class EventBroker:
+    """
+    Fans server-sent events out to every connected browser.
+    An event is serialized once and dropped into each subscriber's bounded
+    queue, so one update costs one fan-out no matter how many dashboards are
+    open. A slow client loses its oldest events instead of blocking the publisher.
+    At most `max_subscribers` streams are open at once (each holds a server
+    thread); subscribe() returns None beyond that.
+    """
+
+    def __init__(self, max_queue=100, max_subscribers=None):
+        self.max_queue = max_queue
+        self.max_subscribers = max_subscribers
+        self.rejected = 0
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        q = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            if self.max_subscribers is not None and len(self._subscribers) >= self.max_subscribers:
+                self.rejected += 1
+                return None
+            self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, event, data):
+        message = format_sse(event, data)
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(message)
+            except queue.Full:
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    pass
+                try:
+                    q.put_nowait(message)
+                except queue.Full:
+                    pass
+
+    def stream(self, q, heartbeat=15, max_seconds=None, retry_ms=3000):
+        """
+        Generator for a streaming response: yields the events of subscriber
+        queue `q` (from subscribe()) and a comment line every `heartbeat`
+        seconds to keep the connection open. After `max_seconds` the stream
+        ends; EventSource reconnects after `retry_ms`, so a stuck client can't
+        hold a server thread forever.
+        """
+        deadline = time.monotonic() + max_seconds if max_seconds else None
+        try:
+            yield f"retry: {retry_ms}\n: connected\n\n"
+            while True:
+                timeout = heartbeat
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return
+                    timeout = min(heartbeat, remaining)
+                try:
+                    yield q.get(timeout=timeout)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+        finally:
+            self.unsubscribe(q)
+
+def symbol_delta(symbol, old, new):
+    """
+    What changed for one symbol between two refreshes: changed fields plus
+    articles whose URL wasn't there before. Returns None if nothing changed.
+    """
+    old = old or {}
+    delta = {}
+    for field in SYMBOL_FIELDS:
+        if new.get(field) != old.get(field):
+            delta[field] = new.get(field)
+
+    seen = {art.get("url") for art in old.get("news", [])}
+    new_articles = [
+        {
+            "title": art.get("title"),
+            "url": art.get("url"),
+            "local_sentiment": art.get("local_sentiment")
+        }
+        for art in new.get("news", []) if art.get("url") not in seen
+    ]
+    if new_articles:
+        delta["new_articles"] = new_articles
+
+    if not delta:
+        return None
+    delta["symbol"] = symbol
+    return delta
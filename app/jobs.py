@@ -0,0 +1,107 @@
+import threading
+import logging
+import time
+import uuid
+from collections import OrderedDict
+
+class BackgroundRefresh:
+    """
+    Runs a refresh function in a background thread, at most one at a time.
+    start() returns immediately with a job handle; while a refresh is running,
+    every caller gets that same job instead of starting another, so stale
+    data can be served while exactly one revalidation is in progress.
+    The most recent `history` jobs are kept for status lookups.
+    After consecutive failures, revalidate() waits `retry_backoff` seconds,
+    doubling per failure up to `retry_backoff_max`, so an upstream outage
+    isn't hammered by one refresh per stale check.
+    """
+
+    def __init__(self, refresh, history=20, retry_backoff=60, retry_backoff_max=1800):
+        self._refresh = refresh
+        self._history = history
+        self._retry_backoff = retry_backoff
+        self._retry_backoff_max = retry_backoff_max
+        self._jobs = OrderedDict()
+        self._current = None
+        self._failures = 0
+        self._last_finished = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._current is not None
+
+    def start(self, reason, refresh=None):
+        """
+        Start a refresh (or join the running one). `refresh` overrides the
+        function for this job, e.g. to warm up before the first refresh.
+        Returns (job, started) where started is False if an existing job was joined.
+        """
+        with self._lock:
+            if self._current is not None:
+                return dict(self._current), False
+            job = {
+                "id": uuid.uuid4().hex[:12],
+                "reason": reason,
+                "status": "running",
+                "started": time.time(),
+                "finished": None,
+                "error": None
+            }
+            self._current = job
+            self._jobs[job["id"]] = job
+            while len(self._jobs) > self._history:
+                self._jobs.popitem(last=False)
+
+        thread = threading.Thread(
+            target=self._run, args=(job, refresh or self._refresh),
+            name=f"finsum-refresh-{job['id']}", daemon=True
+        )
+        thread.start()
+        return dict(job), True
+
+    def retry_in(self):
+        """
+        Seconds until revalidate() may start another refresh after failures (0 if none).
+        """
+        with self._lock:
+            if not self._failures or self._last_finished is None:
+                return 0
+            backoff = min(self._retry_backoff * 2 ** (self._failures - 1), self._retry_backoff_max)
+            return max(0, self._last_finished + backoff - time.time())
+
+    def revalidate(self, reason):
+        """
+        start() for automatic refreshes of stale data: joins a running job,
+        but starts nothing (returns (None, False)) while backing off after failures.
+        """
+        if not self.running and self.retry_in() > 0:
+            return None, False
+        return self.start(reason)
+
+    def _run(self, job, refresh):
+        try:
+            ok = refresh()
+            status, error = ("succeeded", None) if ok is not False else ("failed", "refresh reported failure")
+        except Exception as e:
+            logging.error(f"Background refresh {job['id']} failed: {e}")
+            status, error = "failed", str(e)
+        job_finished = time.time()
+        with self._lock:
+            job.update(status=status, error=error, finished=job_finished)
+            self._current = None
+            self._last_finished = job_finished
+            self._failures = self._failures + 1 if status == "failed" else 0
+
+    def job(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "running": dict(self._current) if self._current else None,
+                "consecutive_failures": self._failures,
+                "recent": [dict(job) for job in reversed(self._jobs.values())]
+            }
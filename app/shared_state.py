@@ -0,0 +1,169 @@
+import sqlite3
+import json
+import time
+import os
+from contextlib import closing
+
+from .analysis.jsonutil import json_default, json_object_hook
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, every process runs as its own leader
+    fcntl = None
+
+# Snapshots are whole refresh results, written by the leader and read by
+# every worker. `version` increases with each publish, so a worker only
+# decodes a snapshot when it is newer than the one it already has.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    version INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    created REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_name_version ON snapshots (name, version DESC);
+CREATE TABLE IF NOT EXISTS refresh_requests (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    reason TEXT,
+    requested REAL NOT NULL,
+    handled REAL
+);
+"""
+
+class LeaderLock:
+    """
+    Non-blocking exclusive lock on a file, held for the life of the process.
+    Exactly one process holds it; when that process exits (or crashes) the OS
+    releases it and another process can take over.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    @property
+    def held(self):
+        return self._file is not None
+
+    def try_acquire(self):
+        if self._file is not None:
+            return True
+        if fcntl is None:
+            self._file = True
+            return True
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        handle = open(self.path, "a+")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        handle.seek(0)
+        handle.truncate()
+        handle.write(str(os.getpid()))
+        handle.flush()
+        self._file = handle
+        return True
+
+    def release(self):
+        if self._file is not None and fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+        self._file = None
+
+class SnapshotStore:
+    """
+    Versioned result snapshots in SQLite (WAL, so readers never block the
+    leader's writes), plus a queue of refresh requests from other workers.
+    """
+
+    def __init__(self, path, keep=5):
+        self.path = path
+        self.keep = keep
+        self._initialized = False
+
+    def _connect(self):
+        if not self._initialized:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with closing(sqlite3.connect(self.path, timeout=10)) as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(SCHEMA)
+                conn.commit()
+            self._initialized = True
+        return sqlite3.connect(self.path, timeout=10)
+
+    def publish(self, name, data, created=None):
+        """
+        Store a new snapshot and drop all but the newest `keep`. Returns its version.
+        """
+        payload = json.dumps(data, default=json_default)
+        with closing(self._connect()) as conn:
+            with conn:
+                cur = conn.execute(
+                    "INSERT INTO snapshots (name, created, data) VALUES (?, ?, ?)",
+                    (name, created or time.time(), payload)
+                )
+                version = cur.lastrowid
+                conn.execute(
+                    "DELETE FROM snapshots WHERE name = ? AND version NOT IN "
+                    "(SELECT version FROM snapshots WHERE name = ? ORDER BY version DESC LIMIT ?)",
+                    (name, name, self.keep)
+                )
+        return version
+
+    def latest_version(self, name):
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT MAX(version) FROM snapshots WHERE name = ?", (name,)).fetchone()
+        return row[0] or 0
+
+    def latest(self, name, newer_than=0):
+        """
+        (version, created, data) of the newest snapshot, or None if there is
+        none newer than `newer_than`.
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT version, created, data FROM snapshots "
+                "WHERE name = ? AND version > ? ORDER BY version DESC LIMIT 1",
+                (name, newer_than)
+            ).fetchone()
+        if row is None:
+            return None
+        version, created, payload = row
+        return version, created, json.loads(payload, object_hook=json_object_hook)
+
+    def request_refresh(self, reason):
+        """
+        Ask the leader for a refresh. Returns (request id, requested time).
+        """
+        now = time.time()
+        with closing(self._connect()) as conn:
+            with conn:
+                cur = conn.execute(
+                    "INSERT INTO refresh_requests (reason, requested) VALUES (?, ?)", (reason, now)
+                )
+        return cur.lastrowid, now
+
+    def take_refresh_requests(self):
+        """
+        Mark pending refresh requests as handled; returns how many there were.
+        """
+        with closing(self._connect()) as conn:
+            with conn:
+                cur = conn.execute(
+                    "UPDATE refresh_requests SET handled = ? WHERE handled IS NULL", (time.time(),)
+                )
+                conn.execute(
+                    "DELETE FROM refresh_requests WHERE handled IS NOT NULL AND handled < ?",
+                    (time.time() - 86400,)
+                )
+        return cur.rowcount
+
+    def refresh_request(self, request_id):
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT id, reason, requested, handled FROM refresh_requests WHERE id = ?", (request_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"id": row[0], "reason": row[1], "requested": row[2], "handled": row[3]}
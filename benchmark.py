@@ -0,0 +1,85 @@
+"""
+Offline load generator for the analysis path.
+
+Runs the analysis pipeline (fetch, scoring, risk) and the index.html render against the
+seeded synthetic data source, so results are reproducible and need no network:
+
+    python benchmark.py --symbols 1000
+    python benchmark.py --symbols 10000 --articles 10 --seed 7
+    DATA_SOURCE=replay python benchmark.py --symbols 11   # recorded fixtures
+"""
+import argparse
+import datetime
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+import config
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark FinSum on synthetic data")
+    parser.add_argument("--symbols", type=int, default=1000, help="number of symbols")
+    parser.add_argument("--articles", type=int, default=5, help="articles per symbol")
+    parser.add_argument("--seed", type=int, default=config.SYNTHETIC_SEED)
+    parser.add_argument("--workers", type=int, default=config.FETCH_MAX_WORKERS)
+    parser.add_argument("--no-render", action="store_true", help="skip the template render")
+    return parser.parse_args()
+
+def render_index(stocks):
+    """
+    Render index.html outside the running app (no scheduler, no startup refresh).
+    """
+    from flask import Flask, render_template
+    app = Flask(__name__, template_folder="app/templates", static_folder="app/static")
+
+    @app.context_processor
+    def inject_now():
+        def now(format_string):
+            return datetime.datetime.now().strftime(format_string)
+        return {'now': now}
+
+    with app.test_request_context("/"):
+        return render_template("index.html", results={"stocks": stocks, "article": None})
+
+def main():
+    args = parse_args()
+    # Must be set before data_fetch registers its providers
+    if os.environ.get("DATA_SOURCE") is None:
+        config.DATA_SOURCE = "synthetic"
+    config.SYNTHETIC_SEED = args.seed
+    config.SYNTHETIC_ARTICLES_PER_SYMBOL = args.articles
+    config.NEWS_FETCH_LIMIT = args.articles
+    config.NEWS_STORE_ENABLED = False
+    # Measure scoring, not scores left on disk by an earlier run
+    config.SENTIMENT_DISK_CACHE_ENABLED = False
+
+    from app.analysis import fixtures
+    from app.analysis.pipeline import AnalysisPipeline
+
+    symbols = fixtures.synthetic_market().symbols(args.symbols)
+    timings = {}
+
+    pipeline = AnalysisPipeline(max_workers=args.workers)
+    started = time.perf_counter()
+    data = pipeline.run(symbols, label="benchmark")
+    timings["pipeline"] = time.perf_counter() - started
+    articles = sum(len(info["news"]) for info in data.values())
+
+    if not args.no_render:
+        started = time.perf_counter()
+        html = render_index(data)
+        timings["render"] = time.perf_counter() - started
+        print(f"Rendered {len(html) / 1024:.0f} KiB of HTML")
+
+    print(f"{len(data)} symbols, {articles} articles (source={config.DATA_SOURCE}, seed={args.seed})")
+    print(f"  {'stage':<16} {'wall':>10}    {'busy':>10}")
+    for stage, report in pipeline.stats()["benchmark"]["stages"].items():
+        if stage != "total":
+            print(f"  {stage:<16} {report['wall'] * 1000:10.1f} ms {report['busy'] * 1000:10.1f} ms")
+    for stage, seconds in timings.items():
+        print(f"  {stage:<16} {seconds * 1000:10.1f} ms")
+    print(f"  {'total':<16} {sum(timings.values()) * 1000:10.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -14,4 +14,192 @@ DEBUG = False
 SECRET_KEY = os.environ.get("SECRET_KEY", "some-secret-key")
 
 # For advanced features
-USE_FINBERT = False  # set True if you want to try local FinBERT 
\ No newline at end of file
+USE_FINBERT = False  # set True if you want to try local FinBERT 
+# Batched FinBERT inference: padded tokens per micro-batch, texts per micro-batch,
+# and torch intra-op threads (0 = torch default)
+FINBERT_MAX_BATCH_TOKENS = 8192
+FINBERT_MAX_BATCH_SIZE = 64
+FINBERT_NUM_THREADS = int(os.environ.get("FINBERT_NUM_THREADS", "0"))
+# FinBERT runtime: "torch" (FP32), "torch-int8" (dynamic int8 quantization),
+# "onnx" or "onnx-int8" (ONNX Runtime on CPU; the graph is exported on first use)
+FINBERT_BACKEND = os.environ.get("FINBERT_BACKEND", "torch")
+FINBERT_ONNX_PATH = os.environ.get(
+    "FINBERT_ONNX_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "finbert.onnx")
+)
+
+# Concurrent data fetching
+# Number of symbols fetched in parallel by data_fetch.analyze_stocks (1 = sequential)
+FETCH_MAX_WORKERS = int(os.environ.get("FETCH_MAX_WORKERS", "8"))
+# Seconds a single symbol may take before falling back to mock data
+FETCH_SYMBOL_TIMEOUT = float(os.environ.get("FETCH_SYMBOL_TIMEOUT", "20"))
+
+# Shared quote/news cache (app/analysis/cache.py)
+# Seconds before a cached quote / news list is fetched again
+QUOTE_CACHE_TTL = int(os.environ.get("QUOTE_CACHE_TTL", "60"))
+NEWS_CACHE_TTL = int(os.environ.get("NEWS_CACHE_TTL", "900"))
+# Max entries per cache before least recently used ones are evicted
+QUOTE_CACHE_SIZE = 2048
+NEWS_CACHE_SIZE = 2048
+
+# Persistent news store (app/analysis/news_store.py)
+NEWS_STORE_ENABLED = os.environ.get("NEWS_STORE_ENABLED", "1") == "1"
+NEWS_STORE_PATH = os.environ.get(
+    "NEWS_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "news.db")
+)
+# Articles requested per symbol from each news provider
+NEWS_FETCH_LIMIT = int(os.environ.get("NEWS_FETCH_LIMIT", "5"))
+# How many stored articles to show per symbol
+NEWS_DISPLAY_LIMIT = int(os.environ.get("NEWS_DISPLAY_LIMIT", "10"))
+
+# Outbound HTTP (app/analysis/http_client.py)
+# (connect, read) timeouts in seconds
+HTTP_CONNECT_TIMEOUT = 3.05
+HTTP_READ_TIMEOUT = 10
+# Retries after the first attempt, with jittered exponential backoff
+HTTP_RETRIES = 2
+HTTP_BACKOFF_BASE = 0.5
+HTTP_BACKOFF_MAX = 8
+# Connection pool: number of hosts kept and max concurrent connections per host
+HTTP_POOL_HOSTS = 10
+HTTP_MAX_CONNECTIONS_PER_HOST = 8
+
+# Provider circuit breakers (app/analysis/providers.py)
+# Consecutive errors/empty responses before a provider is skipped
+PROVIDER_FAILURE_THRESHOLD = 3
+# Seconds a failing provider is skipped before a half-open probe is sent
+PROVIDER_RESET_TIMEOUT = 120
+
+# Hedged news requests: race the news providers instead of trying them one by one
+NEWS_HEDGE_ENABLED = os.environ.get("NEWS_HEDGE_ENABLED", "0") == "1"
+# Seconds to wait for a provider before also starting the next one
+NEWS_HEDGE_DELAY = 1.5
+# Overall seconds per symbol before falling back to stored/mock news
+NEWS_SYMBOL_DEADLINE = 8
+NEWS_HEDGE_WORKERS = 16
+
+# Where quotes/news come from (app/analysis/fixtures.py):
+# "live", "record" (live + save responses), "replay" (saved responses only)
+# or "synthetic" (seeded generator). The last two need no network.
+DATA_SOURCE = os.environ.get("DATA_SOURCE", "live")
+FIXTURE_DIR = os.environ.get(
+    "FIXTURE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "fixtures")
+)
+SYNTHETIC_SEED = int(os.environ.get("SYNTHETIC_SEED", "42"))
+SYNTHETIC_ARTICLES_PER_SYMBOL = int(os.environ.get("SYNTHETIC_ARTICLES_PER_SYMBOL", "5"))
+
+# Daily price history used for volatility/drawdown/volume risk features
+HISTORY_ENABLED = os.environ.get("HISTORY_ENABLED", "1") == "1"
+# Rolling window in trading days
+HISTORY_WINDOW_DAYS = 30
+
+# Sentiment scores kept in memory (per backend/model), so repeat headlines are free
+SENTIMENT_MEMO_SIZE = 20000
+# Scores persisted on disk (SQLite, shared by all workers) so restarts don't re-score
+SENTIMENT_DISK_CACHE_ENABLED = os.environ.get("SENTIMENT_DISK_CACHE_ENABLED", "1") == "1"
+SENTIMENT_DISK_CACHE_PATH = os.environ.get(
+    "SENTIMENT_DISK_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "sentiment_cache.db")
+)
+# Maximum cached scores; least recently used ones are evicted first
+SENTIMENT_DISK_CACHE_SIZE = 200000
+
+# GPT article summaries cached on disk (SQLite, shared by all workers)
+SUMMARY_CACHE_PATH = os.environ.get(
+    "SUMMARY_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "summary_cache.db")
+)
+# Total size of cached summaries; least recently used ones are evicted first
+SUMMARY_CACHE_MAX_BYTES = 50 * 1024 * 1024
+# Seconds a summary stays valid (None => until evicted)
+SUMMARY_CACHE_TTL = 30 * 24 * 3600
+
+# Articles longer than this (tokens) are summarized in parts, in parallel,
+# and the part summaries merged
+LLM_CHUNK_TOKENS = 2500
+# Q&A on long articles only sends the passages most relevant to the question
+LLM_QA_CONTEXT_TOKENS = 2500
+LLM_QA_CHUNK_TOKENS = 400
+
+# GPT answers to article questions, cached in memory
+QA_CACHE_SIZE = 1000
+QA_CACHE_TTL = 3600  # seconds
+
+# Bulk GPT summaries of watchlist news (llm.summarize_articles)
+SUMMARIZE_NEWS = os.environ.get("SUMMARIZE_NEWS", "0") == "1"
+# Client-side limits; keep them a little under the account's OpenAI limits
+LLM_REQUESTS_PER_MINUTE = int(os.environ.get("LLM_REQUESTS_PER_MINUTE", "500"))
+LLM_TOKENS_PER_MINUTE = int(os.environ.get("LLM_TOKENS_PER_MINUTE", "150000"))
+LLM_MAX_CONCURRENCY = 8
+LLM_MAX_RETRIES = 4
+# Expected completion tokens per summary (for the tokens-per-minute budget)
+LLM_SUMMARY_MAX_TOKENS = 300
+# Seconds a bulk summarization may take before remaining articles are skipped
+LLM_BULK_DEADLINE = 120
+
+# Near-duplicate articles (app/analysis/dedup.py): the same wire story under
+# several tickers/sources is scored and summarized once per refresh
+DEDUP_ENABLED = os.environ.get("DEDUP_ENABLED", "1") == "1"
+# Minimum estimated Jaccard similarity of title word shingles, and of
+# title+summary shingles when both summaries are real (not provider templates)
+DEDUP_TITLE_THRESHOLD = 0.7
+DEDUP_THRESHOLD = 0.8
+DEDUP_SHINGLE_SIZE = 3
+# MinHash permutations, split into LSH bands (permutations / bands rows each)
+DEDUP_NUM_PERM = 64
+DEDUP_BANDS = 16
+
+# Analysis pipeline (app/analysis/pipeline.py): most symbols whose articles
+# are scored together in one sentiment batch while the rest are still fetching
+PIPELINE_SCORE_BATCH_SYMBOLS = 64
+
+# Risk rules (app/analysis/risk.py), applied to every symbol at once.
+# A rule adds `points` when `feature <op> threshold`, or `per_unit` points for
+# each unit of the feature. Features can be any numeric stock field
+# (change_pct, avg_sentiment, volatility, ...) or negative_articles.
+RISK_RULES = [
+    {"feature": "negative_articles", "per_unit": 20},
+    {"feature": "change_pct", "op": "<", "threshold": -2, "points": 40},
+    {"feature": "avg_sentiment", "op": "<", "threshold": -0.2, "points": 30},
+    {"feature": "volatility", "op": ">", "threshold": 60, "points": 20},  # annualized %
+    {"feature": "drawdown", "op": "<", "threshold": -20, "points": 20},  # % below window high
+    {"feature": "volume_spike", "op": ">", "threshold": 2, "points": 10}  # x average volume
+]
+# (minimum points, label), highest first
+RISK_LEVELS = [(70, "High"), (30, "Medium"), (0, "Low")]
+
+# Seconds after which the dashboard data is stale; a stale page is still served
+# right away while one background refresh brings it up to date
+DATA_STALE_AFTER = 1800
+# After a failed refresh, wait this many seconds (doubling per consecutive
+# failure, up to the max) before revalidating stale data again
+REFRESH_RETRY_BACKOFF = 60
+REFRESH_RETRY_BACKOFF_MAX = 1800
+
+# Seconds before a dashboard's /stream connection is closed; the browser's
+# EventSource reconnects by itself, so no client holds a server thread forever
+STREAM_MAX_SECONDS = 300
+# Open /stream connections per worker. Each one holds a gunicorn thread, so
+# keep this below --threads (the Dockerfile runs 128) to leave threads for pages
+STREAM_MAX_SUBSCRIBERS = int(os.environ.get("STREAM_MAX_SUBSCRIBERS", "100"))
+
+# Multi-worker mode (e.g. gunicorn -w N): one worker, chosen by a file lock,
+# runs the scheduler and refreshes; all workers serve its results from a
+# shared SQLite snapshot store. Upstream load stays the same for any N.
+SHARED_STATE_ENABLED = os.environ.get("SHARED_STATE", "0") == "1"
+SHARED_STATE_PATH = os.environ.get(
+    "SHARED_STATE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "shared_state.db")
+)
+LEADER_LOCK_PATH = os.environ.get(
+    "LEADER_LOCK_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "leader.lock")
+)
+# Seconds between snapshot checks / leader takeover attempts
+SHARED_STATE_POLL_SECONDS = 2
+
+# Load yfinance, the sentiment backend and the OpenAI client at startup
+# instead of on first use (they are lazy by default for fast worker start)
+WARM_UP_ON_START = os.environ.get("WARM_UP_ON_START", "0") == "1"